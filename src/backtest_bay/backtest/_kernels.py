@@ -0,0 +1,205 @@
+"""This script deploys the compiled kernels to simulate trading portfolios."""
+
+import functools
+
+import numpy as np
+from numba import njit, prange, types
+
+# Input arrays may be read-only views on pandas data (Copy-on-Write).
+_PRICES = types.Array(types.float64, 1, "C", readonly=True)
+_SIGNALS = types.Array(types.int8, 1, "C", readonly=True)
+_SIGNALS_2D = types.Array(types.int8, 2, "C", readonly=True)
+
+
+@functools.lru_cache(maxsize=16)
+def make_backtest_kernel(tac, trade_pct):
+    """Compile the backtest kernel specialized to the trading parameters.
+
+    The transaction cost and the trade percentage are constant across the whole
+    parameter sweep. Binding them as closure constants lets the compiler fold them
+    and the derived cost factors into the loop as immediate operands. Compiled
+    kernels are kept per parameter pair and cached on disk by Numba.
+
+    Args:
+        tac (float): Transaction cost.
+        trade_pct (float): Percentage of assets to trade per signal.
+
+    Returns:
+        numba.core.registry.CPUDispatcher: Kernel with the arguments
+            `(prices, signals, initial_cash, out_shares, out_holdings, out_cash,
+            out_assets)`.
+    """
+    buy_factor = 1 + tac
+    sell_factor = 1 - tac
+
+    @njit(
+        types.void(
+            _PRICES,
+            _SIGNALS,
+            types.float64,
+            types.int64[::1],
+            types.float64[::1],
+            types.float64[::1],
+            types.float64[::1],
+        ),
+        cache=True,
+        boundscheck=False,
+        error_model="numpy",
+    )
+    def _run(
+        prices, signals, initial_cash, out_shares, out_holdings, out_cash, out_assets
+    ):
+        _simulate(
+            prices,
+            signals,
+            initial_cash,
+            trade_pct,
+            buy_factor,
+            sell_factor,
+            out_shares,
+            out_holdings,
+            out_cash,
+            out_assets,
+        )
+
+    return _run
+
+
+@functools.lru_cache(maxsize=16)
+def make_backtest_batch_kernel(tac, trade_pct):
+    """Compile the parallel backtest kernel for several strategies.
+
+    Specialized to the trading parameters like `make_backtest_kernel`.
+
+    Args:
+        tac (float): Transaction cost.
+        trade_pct (float): Percentage of assets to trade per signal.
+
+    Returns:
+        numba.core.registry.CPUDispatcher: Kernel with the arguments
+            `(prices, signals, initial_cash, out_shares, out_holdings, out_cash,
+            out_assets)`, where `signals` and the outputs have the shape
+            (strategies, n).
+    """
+    buy_factor = 1 + tac
+    sell_factor = 1 - tac
+
+    @njit(
+        types.void(
+            _PRICES,
+            _SIGNALS_2D,
+            types.float64,
+            types.int64[:, ::1],
+            types.float64[:, ::1],
+            types.float64[:, ::1],
+            types.float64[:, ::1],
+        ),
+        cache=True,
+        boundscheck=False,
+        error_model="numpy",
+        parallel=True,
+    )
+    def _run_batch(
+        prices, signals, initial_cash, out_shares, out_holdings, out_cash, out_assets
+    ):
+        for j in prange(signals.shape[0]):
+            _simulate(
+                prices,
+                signals[j],
+                initial_cash,
+                trade_pct,
+                buy_factor,
+                sell_factor,
+                out_shares[j],
+                out_holdings[j],
+                out_cash[j],
+                out_assets[j],
+            )
+
+    return _run_batch
+
+
+@njit(inline="always")
+def _simulate(
+    prices,
+    signals,
+    initial_cash,
+    trade_pct,
+    buy_factor,
+    sell_factor,
+    out_shares,
+    out_holdings,
+    out_cash,
+    out_assets,
+):
+    """Simulate the portfolio over all price bars in a single compiled loop.
+
+    Inlined into the specialized kernels, so the trading parameters are compile-time
+    constants there. Runs of bars without a signal only revalue the holdings. On
+    signal bars both trade candidates are computed and applied through masks, so
+    that part is straight-line code. The results are written into the preallocated
+    output arrays.
+
+    Args:
+        prices (np.ndarray): Asset prices as float64 array.
+        signals (np.ndarray): Trading signals as int8 array (2: Buy, 1: Sell).
+        initial_cash (float): Initial cash available for trading.
+        trade_pct (float): Percentage of assets to trade per signal.
+        buy_factor (float): Cost factor of a buy, 1 + transaction cost.
+        sell_factor (float): Proceeds factor of a sell, 1 - transaction cost.
+        out_shares (np.ndarray): Output int64 array for the shares.
+        out_holdings (np.ndarray): Output float64 array for the holdings.
+        out_cash (np.ndarray): Output float64 array for the cash.
+        out_assets (np.ndarray): Output float64 array for the assets.
+    """
+    buy_signal = 2
+    sell_signal = 1
+
+    n = prices.shape[0]
+    cash = initial_cash
+    shares = 0.0
+    assets = cash
+
+    i = 0
+    while i < n:
+        # Bars without a signal leave cash and shares untouched and only revalue
+        # the holdings, so runs of them skip the trade arithmetic entirely.
+        while i < n and signals[i] == 0:
+            holdings = shares * prices[i]
+            assets = cash + holdings
+            out_shares[i] = shares
+            out_holdings[i] = holdings
+            out_cash[i] = cash
+            out_assets[i] = assets
+            i += 1
+        if i == n:
+            break
+
+        price = prices[i]
+        signal = signals[i]
+        trade_vol = trade_pct * assets
+
+        # Effective prices per share including the transaction cost.
+        buy_price = price * buy_factor
+        sell_price = price * sell_factor
+        buy_shares = np.floor(trade_vol / buy_price)
+        buy_cost = buy_shares * buy_price
+        sell_shares = min(np.floor(trade_vol / sell_price), shares)
+        sell_proceeds = sell_shares * sell_price
+
+        do_buy = (signal == buy_signal) & (buy_shares >= 1) & (cash >= buy_cost)
+        do_sell = (signal == sell_signal) & (shares >= 1)
+
+        # Select instead of multiplying by the masks, since a candidate may be
+        # inf or nan (e.g. a zero price) on bars where it is not executed.
+        cash += (sell_proceeds if do_sell else 0.0) - (buy_cost if do_buy else 0.0)
+        shares += (buy_shares if do_buy else 0.0) - (sell_shares if do_sell else 0.0)
+
+        holdings = shares * price
+        assets = cash + holdings
+
+        out_shares[i] = shares
+        out_holdings[i] = holdings
+        out_cash[i] = cash
+        out_assets[i] = assets
+        i += 1
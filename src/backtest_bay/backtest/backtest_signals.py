@@ -1,11 +1,27 @@
 """This script deploys functions to backtest trading signals."""
 
-import math
-
+import numpy as np
 import pandas as pd
 
-
-def backtest_signals(data, signals, initial_cash, tac, trade_pct, price_col="Close"):
+from backtest_bay.backtest._kernels import (
+    make_backtest_batch_kernel,
+    make_backtest_kernel,
+)
+
+# Built once, unlike an 'int | float' union that is created on every call.
+_NUMBER_TYPES = (int, float)
+
+
+def backtest_signals(
+    data,
+    signals,
+    initial_cash,
+    tac,
+    trade_pct,
+    price_col="Close",
+    *,
+    trading_params_validated=False,
+):
     """Backtest trading signals to simulate portfolio performance.
 
     Args:
@@ -20,153 +36,143 @@ def backtest_signals(data, signals, initial_cash, tac, trade_pct, price_col="Clo
         tac (int, float): Transaction cost as a percentage (e.g., 0.05 for 5%).
         trade_pct (float): Percentage of 'initial_cash' to trade per signal.
         price_col (str): Column name for the asset's price. Default is 'Close'.
+        trading_params_validated (bool): Whether `initial_cash`, `tac` and
+            `trade_pct` were already checked with `validate_trading_params`, in
+            which case they are not validated again. Default is False.
 
     Returns:
         pd.DataFrame: Portfolio performance over time with columns:
-            - 'price': The price of the stock.
-            - 'signal': Trading signal used (2: Buy, 1: Sell, 0: Do Nothing).
-            - 'shares': Number of shares.
-            - 'holdings': Total value of shares (price * shares)
-            - 'cash': Cash.
-            - 'assets': Portfolio value (cash + holdings).
+            - 'price': The price of the stock (float64).
+            - 'signal': Trading signal used (2: Buy, 1: Sell, 0: Do Nothing) (int8).
+            - 'shares': Number of shares (int64).
+            - 'holdings': Total value of shares (price * shares) (float64).
+            - 'cash': Cash (float64).
+            - 'assets': Portfolio value (cash + holdings) (float64).
     """
-    # Note that the inputs 'data' and 'signals' are already validated in
-    # 'download_data.py' and 'generate_signals.py'
-    _validate_backtest_signals_input(data, initial_cash, tac, trade_pct, price_col)
+    # Note that the input 'data' is already validated in 'download_data.py'.
+    if not trading_params_validated:
+        validate_trading_params(initial_cash, tac, trade_pct)
+    _validate_backtest_signals_input(data, signals, price_col)
 
-    prices = data[price_col]
-    cash, holdings, shares = initial_cash, 0.0, 0
-    assets = cash + holdings
-    portfolio = []
+    # Copies, since the arrays become columns of the returned portfolio.
+    prices = np.array(data[price_col], dtype=np.float64)
+    signals = np.array(signals, dtype=np.int8)
 
-    for price, signal in zip(prices, signals, strict=False):
-        trade_vol = trade_pct * assets
-        cash, shares = _execute_trade(signal, cash, price, shares, trade_vol, tac)
-        assets, holdings = _update_portfolio(cash, shares, price)
-        portfolio.append((price, signal, shares, holdings, cash, assets))
+    n = len(prices)
+    shares = np.empty(n, dtype=np.int64)
+    holdings = np.empty(n, dtype=np.float64)
+    cash = np.empty(n, dtype=np.float64)
+    assets = np.empty(n, dtype=np.float64)
+
+    run = make_backtest_kernel(float(tac), float(trade_pct))
+    run(prices, signals, float(initial_cash), shares, holdings, cash, assets)
 
     portfolio = pd.DataFrame(
-        portfolio,
-        columns=["price", "signal", "shares", "holdings", "cash", "assets"],
+        {
+            "price": prices,
+            "signal": signals,
+            "shares": shares,
+            "holdings": holdings,
+            "cash": cash,
+            "assets": assets,
+        },
         index=data.index,
+        copy=False,
     )
     return portfolio
 
 
-def _execute_trade(signal, cash, price, shares, trade_vol, tac):
-    """Execute a trade based on the trading signal.
-
-    Args:
-        signal (int): Current trading signal.
-        cash (int, float): Current cash.
-        price (float): Current price of the stock.
-        shares (int): Current shares.
-        trade_vol (float): Volume of portfolio to trade.
-        tac (int, float): Transaction cost.
-
-    Returns:
-        tuple: Updated cash and shares after the trade.
-    """
-    buy_signal = 2
-    sell_signal = 1
-
-    if signal == buy_signal:
-        cash, shares = _execute_buy(cash, price, shares, trade_vol, tac)
-
-    elif signal == sell_signal:
-        cash, shares = _execute_sell(cash, price, shares, trade_vol, tac)
-
-    return cash, shares
-
-
-def _execute_buy(cash, price, shares, trade_vol, tac):
-    """Execute a buy trade.
-
-    Args:
-        cash (int, float): Current cash.
-        price (float): Current price of the asset.
-        shares (int): Current shares.
-        trade_vol (float): Volume of portfolio to trade.
-        tac (float): Transaction cost.
-
-    Returns:
-        tuple: Updated cash and shares after the buy trade.
-            - cash (float): Remaining cash after the trade.
-            - shares (int): Updated number of shares held.
-    """
-    buy_shares = math.floor(trade_vol / (price * (1 + tac)))
-    cost = buy_shares * price * (1 + tac)
-
-    if not _is_buy_trade_affordable(buy_shares, cost, cash):
-        return cash, shares
-
-    cash -= cost
-    shares += buy_shares
-    return cash, shares
+def backtest_signals_multi(
+    data,
+    signals,
+    initial_cash,
+    tac,
+    trade_pct,
+    price_col="Close",
+    *,
+    trading_params_validated=False,
+):
+    """Backtest the trading signals of several strategies on the same asset.
 
-
-def _is_buy_trade_affordable(buy_shares, cost, cash):
-    """Check if the buy trade is affordable.
+    All strategies are simulated in one compiled kernel that runs the strategies in
+    parallel, so the price data is only prepared once.
 
     Args:
-        buy_shares (int): Number of shares to buy.
-        cost (int, float): Total cost of the shares.
-        cash (int, float): Current cash.
+        data (pd.DataFrame): DataFrame containing asset price data.
+            - Must include a column specified by `price_col` (default: 'Close').
+        signals (pd.DataFrame): Trading signals with one column per strategy.
+            - 2: Buy Signal
+            - 1: Sell Signal
+            - 0: Do Nothing
+        initial_cash (int, float): Initial cash available for trading.
+        tac (int, float): Transaction cost as a percentage (e.g., 0.05 for 5%).
+        trade_pct (float): Percentage of 'initial_cash' to trade per signal.
+        price_col (str): Column name for the asset's price. Default is 'Close'.
+        trading_params_validated (bool): Whether `initial_cash`, `tac` and
+            `trade_pct` were already checked with `validate_trading_params`, in
+            which case they are not validated again. Default is False.
 
     Returns:
-        bool: True if the trade is affordable, False otherwise.
+        dict: Mapping from strategy (column of `signals`) to its portfolio
+            performance, see `backtest_signals` for the columns.
     """
-    is_trade_vol_enough = buy_shares >= 1
-    is_cash_enough = cash >= cost
-    return is_trade_vol_enough and is_cash_enough
-
-
-def _execute_sell(cash, price, shares, trade_vol, tac):
-    """Execute a sell trade.
+    if not trading_params_validated:
+        validate_trading_params(initial_cash, tac, trade_pct)
+    for strategy in signals.columns:
+        _validate_backtest_signals_input(data, signals[strategy], price_col)
+
+    prices = np.ascontiguousarray(data[price_col].to_numpy(dtype=np.float64))
+    signals_2d = np.array(signals.to_numpy(dtype=np.int8).T, order="C")
+
+    shape = signals_2d.shape
+    shares = np.empty(shape, dtype=np.int64)
+    holdings = np.empty(shape, dtype=np.float64)
+    cash = np.empty(shape, dtype=np.float64)
+    assets = np.empty(shape, dtype=np.float64)
+
+    # The Numba thread count is process-wide, so it is left to the caller
+    # (e.g. via NUMBA_NUM_THREADS).
+    run_batch = make_backtest_batch_kernel(float(tac), float(trade_pct))
+    run_batch(prices, signals_2d, float(initial_cash), shares, holdings, cash, assets)
+
+    portfolios = {}
+    for j, strategy in enumerate(signals.columns):
+        portfolios[strategy] = pd.DataFrame(
+            {
+                "price": prices.copy(),
+                "signal": signals_2d[j],
+                "shares": shares[j],
+                "holdings": holdings[j],
+                "cash": cash[j],
+                "assets": assets[j],
+            },
+            index=data.index,
+            copy=False,
+        )
+    return portfolios
+
+
+def validate_trading_params(initial_cash, tac, trade_pct):
+    """Validate the trading parameters of a backtest.
+
+    The parameters are usually constant across all backtests, so callers can
+    validate them once and skip the check per backtest with
+    `trading_params_validated=True`.
 
     Args:
-        cash (float): Current cash.
-        price (float): Current price.
-        shares (int):  Current shares.
-        trade_vol (float): Volume of portfolio to trade.
-        tac (float): Transaction cost.
-
-    Returns:
-        tuple: Updated cash and shares after the sell trade.
-            - cash (float): Updated cash.
-            - shares (int): Updated shares.
+        initial_cash (int, float): Initial cash available for trading.
+        tac (int, float): Transaction cost as a percentage.
+        trade_pct (float): Percentage of assets to trade per signal.
     """
-    sell_shares = math.floor(trade_vol / (price * (1 - tac)))
-
-    if not _is_sell_trade_affordable(shares):
-        return cash, shares
-
-    sell_shares = min(sell_shares, shares)
-
-    profit = sell_shares * price * (1 - tac)
-    cash += profit
-    shares -= sell_shares
-    return cash, shares
-
-
-def _is_sell_trade_affordable(shares):
-    """Checks if there are enough shares to sell."""
-    return shares >= 1
-
-
-def _update_portfolio(cash, shares, price):
-    """Updates holdings and assets after trade."""
-    holdings = shares * price
-    assets = cash + holdings
-    return assets, holdings
-
-
-def _validate_backtest_signals_input(data, initial_cash, tac, trade_pct, price_col):
-    """Validates input for backtesting signals."""
     _validate_initial_cash(initial_cash)
     _validate_tac(tac)
     _validate_trade_pct(trade_pct)
+
+
+def _validate_backtest_signals_input(data, signals, price_col):
+    """Validates the data dependent input for backtesting signals."""
     _validate_price_col(data, price_col)
+    _validate_signals(data, signals)
 
 
 def _validate_initial_cash(initial_cash):
@@ -179,7 +185,7 @@ def _validate_initial_cash(initial_cash):
         TypeError: If initial_cash is not an integer or float.
         ValueError: If initial_cash is not positive.
     """
-    if not isinstance(initial_cash, int | float):
+    if not isinstance(initial_cash, _NUMBER_TYPES):
         error_msg = f"initial_cash must be a number, got {type(initial_cash).__name__}."
         raise TypeError(error_msg)
     if initial_cash <= 0:
@@ -197,7 +203,7 @@ def _validate_tac(tac):
         TypeError: If tac is not an integer or float.
         ValueError: If tac is negative or greater than 1.
     """
-    if not isinstance(tac, int | float):
+    if not isinstance(tac, _NUMBER_TYPES):
         error_msg = f"tac must be a number, got {type(tac).__name__}."
         raise TypeError(error_msg)
 
@@ -240,9 +246,47 @@ def _validate_price_col(data, price_col):
         raise ValueError(error_msg)
 
 
+def _validate_signals(data, signals):
+    """Validate the trading signals for backtesting.
+
+    The checks run as vectorized operations on the underlying array, since the
+    signals are as long as the price history.
+
+    Args:
+        data (pd.DataFrame): DataFrame containing stock data.
+        signals (pd.Series): Series of trading signals.
+
+    Raises:
+        TypeError: If signals are not integers.
+        ValueError: If signals and data differ in length or contain values other
+            than 0, 1 and 2.
+    """
+    signals = np.asarray(signals)
+
+    if not np.issubdtype(signals.dtype, np.integer):
+        error_msg = f"signals must contain integers, got {signals.dtype}."
+        raise TypeError(error_msg)
+
+    if len(signals) != len(data):
+        error_msg = (
+            "signals must have the same length as data, "
+            f"got {len(signals)} and {len(data)}."
+        )
+        raise ValueError(error_msg)
+
+    max_signal = 2
+    if ((signals < 0) | (signals > max_signal)).any():
+        error_msg = "signals must only contain 0, 1 or 2."
+        raise ValueError(error_msg)
+
+
 def merge_data_with_backtest_portfolio(data, portfolio):
     """Merge downloaded data with backtested portfolio using the index.
 
+    The portfolio is backtested on `data`, so both usually share the same index and
+    the columns are concatenated without an index join. Otherwise the portfolio is
+    aligned to the index of `data` first, as in a left join.
+
     Args:
         data (pd.DataFrame): DataFrame with downloaded data.
         portfolio (pd.DataFrame): DataFrame to be merged with data using the index.
@@ -250,4 +294,6 @@ def merge_data_with_backtest_portfolio(data, portfolio):
     Returns:
         pd.DataFrame: Merged DataFrame.
     """
-    return data.merge(portfolio, how="left", left_index=True, right_index=True)
+    if not portfolio.index.equals(data.index):
+        portfolio = portfolio.reindex(data.index)
+    return pd.concat([data, portfolio], axis=1)
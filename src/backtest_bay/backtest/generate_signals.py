@@ -1,6 +1,14 @@
 """This script deploys functions to generate trading signals."""
 
+import numpy as np
 import pandas as pd
+from numba import njit, types
+
+# Input prices may be a read-only view on pandas data (Copy-on-Write).
+_PRICES = types.Array(types.float64, 1, "C", readonly=True)
+
+# Built once, unlike an 'int | float' union that is created on every call.
+_NUMBER_TYPES = (int, float)
 
 
 def generate_signals(data, method, **kwargs):
@@ -28,10 +36,12 @@ def generate_signals(data, method, **kwargs):
                 - window (int): Window size for calculating RSI.
 
     Returns:
-        pd.Series: Trading signals (2: buy, 1: sell, 0: do nothing).
+        pd.Series: Trading signals as int8 (2: buy, 1: sell, 0: do nothing), lagged
+            by one period so that a signal is traded on the bar after it was
+            generated. The dtype matches what the backtest kernels consume.
     """
     _validate_input_method(method)
-    closing_prices = data["Close"]
+    closing_prices = np.ascontiguousarray(data["Close"].to_numpy(dtype=np.float64))
 
     if method == "bollinger":
         signal = _bollinger_signals(prices=closing_prices, **kwargs)
@@ -41,7 +51,11 @@ def generate_signals(data, method, **kwargs):
         signal = _roc_signals(prices=closing_prices, **kwargs)
     if method == "rsi":
         signal = _rsi_signals(prices=closing_prices, **kwargs)
-    return signal
+
+    lagged = np.empty_like(signal)
+    lagged[:1] = 0
+    lagged[1:] = signal[:-1]
+    return pd.Series(lagged, index=data.index, copy=False)
 
 
 def _bollinger_signals(prices, window=20, num_std_dev=2):
@@ -51,26 +65,95 @@ def _bollinger_signals(prices, window=20, num_std_dev=2):
     to identify overbought (sell signal) and oversold (buy signal) conditions.
 
     Args:
-        prices (pd.Series): Series of asset prices.
+        prices (np.ndarray): Array of asset prices.
         window (int): Window size for Bollinger Bands calculation (default is 20).
         num_std_dev (float): Number of standard deviations for the bands (default is 2).
 
     Returns:
-        pd.Series: Trading signals (2: buy, 1: sell, 0: do nothing).
+        np.ndarray: Trading signals (2: buy, 1: sell, 0: do nothing) on the bar
+            they are generated.
     """
     _validate_input_bollinger_signals(window, num_std_dev)
 
-    moving_avg = prices.rolling(window=window).mean()
-    std_dev = prices.rolling(window=window).std()
+    moving_avg, std_dev = _rolling_mean_std(prices, window)
     upper_band = moving_avg + (num_std_dev * std_dev)
     lower_band = moving_avg - (num_std_dev * std_dev)
 
-    signals = pd.Series(0, index=prices.index)
-    signals.loc[prices < lower_band] = 2
-    signals.loc[prices > upper_band] = 1
+    return _signals_from_conditions(buy=prices < lower_band, sell=prices > upper_band)
+
+
+@njit(cache=True, boundscheck=False)
+def _window_mean_sum_sq_dev(values):
+    """Compute the mean and the sum of squared deviations of the non-NaN values."""
+    count = 0
+    total = 0.0
+    for value in values:
+        if not np.isnan(value):
+            count += 1
+            total += value
+    if count == 0:
+        return 0.0, 0.0
+
+    mean = total / count
+    sum_sq_dev = 0.0
+    for value in values:
+        if not np.isnan(value):
+            sum_sq_dev += (value - mean) ** 2
+    return mean, sum_sq_dev
+
+
+@njit(
+    types.UniTuple(types.float64[::1], 2)(_PRICES, types.int64),
+    cache=True,
+    boundscheck=False,
+)
+def _rolling_mean_std(x, window):
+    """Compute the rolling mean and sample standard deviation in a single pass.
+
+    Each price is added to and later removed from a running mean and sum of squared
+    deviations (Welford's update). Every `window` prices, both are recomputed exactly
+    from the current window, so rounding errors cannot build up. The cost stays
+    linear in the number of prices. Unlike sums of squares, the update does not
+    cancel, and a window of equal prices has a standard deviation of exactly zero.
+    Windows containing NaN yield NaN.
+
+    Args:
+        x (np.ndarray): Array of asset prices.
+        window (int): Window size.
+
+    Returns:
+        tuple: Arrays of the rolling mean and rolling standard deviation (ddof=1),
+            NaN for the first `window - 1` entries.
+    """
+    moving_avg = np.full(x.shape[0], np.nan)
+    std_dev = np.full(x.shape[0], np.nan)
+    count = 0
+    mean = 0.0
+    sum_sq_dev = 0.0
+
+    for i in range(x.shape[0]):
+        if not np.isnan(x[i]):
+            count += 1
+            delta = x[i] - mean
+            mean += delta / count
+            sum_sq_dev += delta * (x[i] - mean)
+
+        if i >= window and not np.isnan(x[i - window]):
+            count -= 1
+            delta = x[i - window] - mean
+            mean -= delta / max(count, 1)
+            sum_sq_dev -= delta * (x[i - window] - mean)
 
-    signals = signals.shift(periods=1, fill_value=0)
-    return signals
+        # Recomputing the window every 'window' steps stops rounding errors from
+        # accumulating, at the cost of a second linear pass.
+        if (i + 1) % window == 0:
+            mean, sum_sq_dev = _window_mean_sum_sq_dev(x[i + 1 - window : i + 1])
+
+        if i >= window - 1 and count == window:
+            moving_avg[i] = mean
+            std_dev[i] = np.sqrt(max(sum_sq_dev, 0.0) / (window - 1))
+
+    return moving_avg, std_dev
 
 
 def _macd_signals(prices, short_window=12, long_window=26, signal_window=9):
@@ -80,27 +163,77 @@ def _macd_signals(prices, short_window=12, long_window=26, signal_window=9):
     A sell signal (1) is generated when the MACD line crosses below the Signal Line.
 
     Args:
-        prices (pd.Series): Series of asset prices.
+        prices (np.ndarray): Array of asset prices.
         short_window (int): Window size for the short EMA (default: 12).
         long_window (int): Window size for the long EMA (default: 26).
         signal_window (int): Window size for the signal line EMA (default: 9).
 
     Returns:
-        pd.Series: Trading signals (2: buy, 1: sell, 0: do nothing).
+        np.ndarray: Trading signals (2: buy, 1: sell, 0: do nothing) on the bar
+            they are generated.
     """
     _validate_input_macd_signals(short_window, long_window, signal_window)
 
-    short_ema = prices.ewm(span=short_window, adjust=False).mean()
-    long_ema = prices.ewm(span=long_window, adjust=False).mean()
-    macd_line = short_ema - long_ema
-    signal_line = macd_line.ewm(span=signal_window, adjust=False).mean()
+    macd_line, signal_line = _macd(
+        prices, 2 / (short_window + 1), 2 / (long_window + 1), 2 / (signal_window + 1)
+    )
+
+    return _signals_from_conditions(
+        buy=macd_line > signal_line, sell=macd_line < signal_line
+    )
+
+
+@njit(
+    types.UniTuple(types.float64[::1], 2)(
+        _PRICES, types.float64, types.float64, types.float64
+    ),
+    cache=True,
+    boundscheck=False,
+)
+def _macd(x, alpha_short, alpha_long, alpha_signal):
+    """Compute the MACD and signal line with all three EMAs fused in one pass.
 
-    signals = pd.Series(0, index=prices.index)
-    signals.loc[macd_line > signal_line] = 2
-    signals.loc[macd_line < signal_line] = 1
+    Each EMA follows `ema = ema + alpha * (value - ema)`, started at the first valid
+    price, which equals pandas' `ewm(adjust=False)`. NaN prices leave the EMAs
+    unchanged.
 
-    signals = signals.shift(periods=1, fill_value=0)
-    return signals
+    Args:
+        x (np.ndarray): Array of asset prices.
+        alpha_short (float): Smoothing factor of the short EMA.
+        alpha_long (float): Smoothing factor of the long EMA.
+        alpha_signal (float): Smoothing factor of the signal line EMA.
+
+    Returns:
+        tuple: Arrays of the MACD line and the signal line.
+    """
+    macd_line = np.full(x.shape[0], np.nan)
+    signal_line = np.full(x.shape[0], np.nan)
+    started = False
+    short_ema = 0.0
+    long_ema = 0.0
+    signal_ema = 0.0
+
+    for i in range(x.shape[0]):
+        if np.isnan(x[i]):
+            if started:
+                macd_line[i] = short_ema - long_ema
+                signal_line[i] = signal_ema
+            continue
+
+        if not started:
+            short_ema = x[i]
+            long_ema = x[i]
+            signal_ema = 0.0
+            started = True
+        else:
+            short_ema += alpha_short * (x[i] - short_ema)
+            long_ema += alpha_long * (x[i] - long_ema)
+            signal_ema += alpha_signal * (short_ema - long_ema - signal_ema)
+
+        macd_line[i] = short_ema - long_ema
+        signal_line[i] = signal_ema
+
+    return macd_line, signal_line
 
 
 def _roc_signals(prices, window=10):
@@ -110,22 +243,22 @@ def _roc_signals(prices, window=10):
     and a sell signal (1) is generated when the ROC is negative.
 
     Args:
-        prices (pd.Series): Series of asset prices.
+        prices (np.ndarray): Array of asset prices.
         window (int): Window size for computing the ROC.
 
     Returns:
-        pd.Series: Trading signals (2: buy, 1: sell, 0: do nothing).
+        np.ndarray: Trading signals (2: buy, 1: sell, 0: do nothing) on the bar
+            they are generated.
     """
     _validate_input_window(window)
 
-    roc = prices.pct_change(periods=window - 1)
+    lag = window - 1
 
-    signals = pd.Series(0, index=prices.index, dtype=int)
-    signals.loc[roc > 0] = 2
-    signals.loc[roc < 0] = 1
+    roc = np.full(len(prices), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roc[lag:] = prices[lag:] / prices[:-lag] - 1
 
-    signals = signals.shift(periods=1, fill_value=0)
-    return signals
+    return _signals_from_conditions(buy=roc > 0, sell=roc < 0)
 
 
 def _rsi_signals(prices, window=14):
@@ -133,34 +266,71 @@ def _rsi_signals(prices, window=14):
 
     A buy signal (2) is generated when RSI is below 30 (oversold),
     and a sell signal (1) is generated when RSI is above 70 (overbought).
+    Average gains and losses are smoothed with Wilder's method.
 
     Args:
-        prices (pd.Series): Series of asset prices.
+        prices (np.ndarray): Array of asset prices.
         window (int): Window size for computing RSI.
 
     Returns:
-        pd.Series: Trading signals (2: buy, 1: sell, 0: do nothing).
+        np.ndarray: Trading signals (2: buy, 1: sell, 0: do nothing) on the bar
+            they are generated.
     """
     _validate_input_window(window)
 
-    delta = prices.diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-
-    avg_gain = gain.rolling(window=window, min_periods=1).mean()
-    avg_loss = loss.rolling(window=window, min_periods=1).mean()
+    rsi = _rsi(prices, window)
 
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-
-    signals = pd.Series(0, index=prices.index, dtype=int)
     upper_cutoff = 70
     lower_cutoff = 30
-    signals.loc[rsi < lower_cutoff] = 2
-    signals.loc[rsi > upper_cutoff] = 1
+    return _signals_from_conditions(buy=rsi < lower_cutoff, sell=rsi > upper_cutoff)
+
+
+@njit(types.float64[::1](_PRICES, types.int64), cache=True, boundscheck=False)
+def _rsi(x, window):
+    """Compute the RSI in a single pass using Wilder's smoothing.
+
+    The average gain and loss start at zero and are updated recursively with
+    `avg = ((window - 1) * avg + value) / window`. Price changes involving NaN
+    count as zero.
+
+    Args:
+        x (np.ndarray): Array of asset prices.
+        window (int): Window size for computing RSI.
+
+    Returns:
+        np.ndarray: RSI values, NaN where no price change has been observed yet.
+    """
+    rsi = np.full(x.shape[0], np.nan)
+    avg_gain = 0.0
+    avg_loss = 0.0
 
-    signals = signals.shift(periods=1, fill_value=0)
-    return signals
+    for i in range(1, x.shape[0]):
+        delta = x[i] - x[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = ((window - 1) * avg_gain + gain) / window
+        avg_loss = ((window - 1) * avg_loss + loss) / window
+
+        if avg_loss > 0:
+            rsi[i] = 100 - 100 / (1 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            rsi[i] = 100.0
+
+    return rsi
+
+
+def _signals_from_conditions(buy, sell):
+    """Build trading signals from buy and sell conditions in a single pass.
+
+    Args:
+        buy (np.ndarray): Boolean array, True where a buy signal is generated.
+        sell (np.ndarray): Boolean array, True where a sell signal is generated.
+            Takes precedence over `buy`.
+
+    Returns:
+        np.ndarray: Trading signals as int8 (2: buy, 1: sell, 0: do nothing).
+    """
+    return np.select([sell, buy], [np.int8(1), np.int8(2)], default=np.int8(0))
 
 
 def _validate_input_method(method):
@@ -243,7 +413,7 @@ def _validate_input_num_std_dev(num_std_dev):
         TypeError: If num_std_dev is not a number.
         ValueError: If num_std_dev is not positive.
     """
-    if not isinstance(num_std_dev, int | float):
+    if not isinstance(num_std_dev, _NUMBER_TYPES):
         error_msg = f"'num_std_dev' must be a number, got {type(num_std_dev).__name__}."
         raise TypeError(error_msg)
 
@@ -1,15 +1,14 @@
-"""This script deploys a task to generate trading signals and backtest them."""
-
-import itertools
+"""This script deploys a task to backtest trading signals."""
 
 import pandas as pd
 import pytask
+from pyarrow import feather
 
 from backtest_bay.backtest.backtest_signals import (
-    backtest_signals,
+    backtest_signals_multi,
     merge_data_with_backtest_portfolio,
+    validate_trading_params,
 )
-from backtest_bay.backtest.generate_signals import generate_signals
 from backtest_bay.config import (
     BLD,
     END_DATE,
@@ -23,48 +22,58 @@ from backtest_bay.config import (
     TRADE_PCT,
 )
 
-scripts = [
+scripts = (
     SRC / "config.py",
-    SRC / "backtest" / "generate_signals.py",
     SRC / "backtest" / "backtest_signals.py",
-]
-
-params_to_backtest = pd.DataFrame(
-    list(itertools.product(STOCKS, [START_DATE], [END_DATE], [INTERVAL], STRATEGIES)),
-    columns=["stock", "start_date", "end_date", "interval", "strategy"],
+    SRC / "backtest" / "_kernels.py",
 )
 
+# The trading parameters are the same for every backtest, so check them only once.
+validate_trading_params(INITIAL_CASH, TAC, TRADE_PCT)
 
-for row in params_to_backtest.itertuples(index=False):
-    id_backtest = (
-        f"{row.stock}_{row.start_date}_{row.end_date}_" f"{row.interval}_{row.strategy}"
-    )
-    stock_data_path = (
-        BLD / "data" / f"{row.stock}_{row.start_date}_{row.end_date}_{row.interval}.pkl"
-    )
-    produces = BLD / "backtest" / f"{id_backtest}.pkl"
-    strategy = row.strategy
+for stock in STOCKS:
+    id_data = f"{stock}_{START_DATE}_{END_DATE}_{INTERVAL}"
+    stock_data_path = BLD / "data" / f"{id_data}.arrow"
+    signals_paths = {
+        strategy: BLD / "signals" / f"{id_data}_{strategy}.arrow"
+        for strategy in STRATEGIES
+    }
+    produces = {
+        strategy: BLD / "backtest" / f"{id_data}_{strategy}.arrow"
+        for strategy in STRATEGIES
+    }
 
-    @pytask.task(id=id_backtest)
+    @pytask.task(id=id_data)
     def task_backtest(
         scripts=scripts,
         stock_data_path=stock_data_path,
+        signals_paths=signals_paths,
         produces=produces,
-        strategy=strategy,
     ):
-        """Task to generate signals, backtest and store results it in the bld folder."""
-        stock_data = pd.read_pickle(stock_data_path)
-        signals = generate_signals(data=stock_data, method=strategy)
-        backtested_portfolio = backtest_signals(
+        """Task to backtest all strategies on a stock and store them in bld."""
+        stock_data = feather.read_table(stock_data_path, memory_map=True).to_pandas(
+            split_blocks=True
+        )
+        signals = pd.DataFrame(
+            {
+                strategy: feather.read_table(path).column("signal").to_numpy()
+                for strategy, path in signals_paths.items()
+            },
+            index=stock_data.index,
+        )
+        backtested_portfolios = backtest_signals_multi(
             data=stock_data,
             signals=signals,
             initial_cash=INITIAL_CASH,
             tac=TAC,
             trade_pct=TRADE_PCT,
+            trading_params_validated=True,
         )
 
-        merged_portfolio = merge_data_with_backtest_portfolio(
-            stock_data, backtested_portfolio
-        )
-
-        merged_portfolio.to_pickle(produces)
+        for strategy, backtested_portfolio in backtested_portfolios.items():
+            merged_portfolio = merge_data_with_backtest_portfolio(
+                stock_data, backtested_portfolio
+            )
+            feather.write_feather(
+                merged_portfolio, produces[strategy], compression="zstd"
+            )
@@ -0,0 +1,41 @@
+"""This script deploys a task to generate trading signals."""
+
+import pytask
+from pyarrow import feather
+
+from backtest_bay.backtest.generate_signals import generate_signals
+from backtest_bay.config import (
+    BLD,
+    END_DATE,
+    INTERVAL,
+    SRC,
+    START_DATE,
+    STOCKS,
+    STRATEGIES,
+)
+
+# The signals only depend on the stock data and the signal logic. Leaving out
+# 'config.py' keeps them cached when only the trading parameters change.
+scripts = (SRC / "backtest" / "generate_signals.py",)
+
+for stock in STOCKS:
+    id_data = f"{stock}_{START_DATE}_{END_DATE}_{INTERVAL}"
+    stock_data_path = BLD / "data" / f"{id_data}.arrow"
+    produces = {
+        strategy: BLD / "signals" / f"{id_data}_{strategy}.arrow"
+        for strategy in STRATEGIES
+    }
+
+    @pytask.task(id=id_data)
+    def task_generate_signals(
+        scripts=scripts,
+        stock_data_path=stock_data_path,
+        produces=produces,
+    ):
+        """Task to generate the signals of all strategies on a stock."""
+        stock_data = feather.read_table(stock_data_path, memory_map=True).to_pandas(
+            split_blocks=True
+        )
+        for strategy, path in produces.items():
+            signals = generate_signals(data=stock_data, method=strategy)
+            feather.write_feather(signals.to_frame(name="signal"), path)
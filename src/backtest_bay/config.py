@@ -13,9 +13,13 @@ Parameters:
         (e.g., 0.005 for 0.5%).
     TRADE_PCT (float): Percentage of available capital to invest per trade
         (e.g., 0.05 for 5%).
+    PARAMS (tuple of Params): All combinations of stock, start date, end date,
+        interval and strategy to backtest.
 """
 
+import itertools
 from pathlib import Path
+from typing import NamedTuple
 
 SRC = Path(__file__).parent.resolve()
 ROOT = SRC.joinpath("..", "..").resolve()
@@ -35,3 +39,22 @@ STRATEGIES = ["bollinger", "macd", "roc", "rsi"]
 INITIAL_CASH = 1000000
 TAC = 0.005
 TRADE_PCT = 0.05
+
+
+# Parameter grid
+class Params(NamedTuple):
+    """A single backtest configuration of the parameter grid."""
+
+    stock: str
+    start_date: str
+    end_date: str
+    interval: str
+    strategy: str
+
+
+PARAMS = tuple(
+    Params(*combination)
+    for combination in itertools.product(
+        STOCKS, [START_DATE], [END_DATE], [INTERVAL], STRATEGIES
+    )
+)
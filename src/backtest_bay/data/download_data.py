@@ -5,6 +5,25 @@ from datetime import datetime
 import pandas as pd
 import yfinance as yf
 
+# Intervals supported by yfinance, built once instead of on every validation.
+_VALID_INTERVALS = frozenset(
+    {
+        "1m",
+        "2m",
+        "5m",
+        "15m",
+        "30m",
+        "60m",
+        "90m",
+        "1h",
+        "1d",
+        "5d",
+        "1wk",
+        "1mo",
+        "3mo",
+    }
+)
+
 
 def download_data(symbol, interval, start_date, end_date):
     """Download historical stock data and validate it.
@@ -48,23 +67,8 @@ def _validate_symbol(symbol):
 
 def _validate_interval(interval):
     """Validate if interval is within the allowed set."""
-    valid_intervals = {
-        "1m",
-        "2m",
-        "5m",
-        "15m",
-        "30m",
-        "60m",
-        "90m",
-        "1h",
-        "1d",
-        "5d",
-        "1wk",
-        "1mo",
-        "3mo",
-    }
-    if interval not in valid_intervals:
-        error_msg = f"Invalid interval. Choose from {', '.join(valid_intervals)}."
+    if interval not in _VALID_INTERVALS:
+        error_msg = f"Invalid interval. Choose from {', '.join(_VALID_INTERVALS)}."
         raise ValueError(error_msg)
 
 
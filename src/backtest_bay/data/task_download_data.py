@@ -1,24 +1,39 @@
 """This script deploys a task to download data."""
 
-import itertools
+from typing import NamedTuple
 
-import pandas as pd
 import pytask
+from pyarrow import feather
 
-from backtest_bay.config import BLD, END_DATE, INTERVAL, SRC, START_DATE, STOCKS
+from backtest_bay.config import BLD, PARAMS, SRC
 from backtest_bay.data.download_data import download_data
 
-scripts = [SRC / "config.py", SRC / "data" / "download_data.py"]
+# The download parameters are part of the task id and path, so changes of other
+# settings in 'config.py' do not trigger a new download.
+scripts = (SRC / "data" / "download_data.py",)
 
-data_to_download = pd.DataFrame(
-    list(itertools.product(STOCKS, [START_DATE], [END_DATE], [INTERVAL])),
-    columns=["stock", "start_date", "end_date", "interval"],
-)
 
-for row in data_to_download.itertuples(index=False):
-    id_download = f"{row.stock}_{row.start_date}_{row.end_date}_{row.interval}"
+class DownloadParams(NamedTuple):
+    """The parameters of a single data download."""
 
-    produces = BLD / "data" / f"{id_download}.pkl"
+    stock: str
+    start_date: str
+    end_date: str
+    interval: str
+
+
+# Strategies share the data of a stock, so keep each download once (in order).
+data_to_download = [
+    DownloadParams(*key)
+    for key in dict.fromkeys(
+        (row.stock, row.start_date, row.end_date, row.interval) for row in PARAMS
+    )
+]
+
+for row in data_to_download:
+    id_download = "_".join(row)
+
+    produces = BLD / "data" / f"{id_download}.arrow"
 
     @pytask.task(id=id_download)
     def task_download_data(depends_on=scripts, produces=produces, param=row):
@@ -29,4 +44,4 @@ for row in data_to_download.itertuples(index=False):
             end_date=param.end_date,
             interval=param.interval,
         )
-        data.to_pickle(produces)
+        feather.write_feather(data, produces, compression="uncompressed")
@@ -9,6 +9,16 @@ pd.options.mode.copy_on_write = True
 pd.options.future.infer_string = True
 pd.options.plotting.backend = "plotly"
 
+_METRIC_NAMES = (
+    "Total Strategy Return",
+    "Annualized Strategy Return",
+    "Annualized Strategy Volatility",
+    "Trades",
+    "Assumed TAC",
+    "Annualized Buy and Hold Return",
+    "Annualized Buy and Hold Volatility",
+)
+
 
 def plot_portfolio(portfolio, title, tac, cash):
     """Plots the portfolio performance and associated financial metrics.
@@ -25,16 +35,18 @@ def plot_portfolio(portfolio, title, tac, cash):
     """
     # Note that there is no need to validate the inputs 'portfolio', 'tac' and 'cash',
     # since they are already checked in 'download_data.py' and 'backtest_signals.py".
-    portfolio_return = _calculate_portfolio_return(portfolio["assets"])
-    annualized_return = _calculate_annualized_return(portfolio["assets"])
-    annualized_volatility = _calculate_annualized_volatility(portfolio["assets"])
+    years = _calculate_years(portfolio.index)
+    assets = portfolio["assets"].to_numpy()
+    portfolio_return = _calculate_portfolio_return(assets)
+    annualized_return = _calculate_annualized_return(portfolio_return, years)
+    annualized_volatility = _calculate_annualized_volatility(assets, years)
     trades = _calculate_trades(portfolio["shares"])
 
-    portfolio["buy_and_hold"] = _buy_and_hold_strategy(cash, portfolio["Close"])
-    buy_and_hold_return = _calculate_annualized_return(portfolio["buy_and_hold"])
-    buy_and_hold_volatility = _calculate_annualized_volatility(
-        portfolio["buy_and_hold"]
+    buy_and_hold = _buy_and_hold_strategy(cash, portfolio["Close"].to_numpy())
+    buy_and_hold_return = _calculate_annualized_return(
+        _calculate_portfolio_return(buy_and_hold), years
     )
+    buy_and_hold_volatility = _calculate_annualized_volatility(buy_and_hold, years)
 
     fig = make_subplots(
         rows=2,
@@ -45,8 +57,9 @@ def plot_portfolio(portfolio, title, tac, cash):
         specs=[[{"type": "xy"}], [{"type": "domain"}]],
     )
 
+    # Plotly serializes ndarrays much faster than a DatetimeIndex or Series.
     portfolio_traces = _create_portfolio_traces(
-        portfolio.index, portfolio["cash"], portfolio["assets"]
+        portfolio.index.to_numpy(), portfolio["cash"].to_numpy(), assets
     )
     for trace in portfolio_traces:
         fig.add_trace(trace, row=1, col=1)
@@ -98,28 +111,21 @@ def _create_metrics_table(
             "align": "center",
         },
         cells={
-            "values": [
-                [
-                    "Total Strategy Return",
-                    "Annualized Strategy Return",
-                    "Annualized Strategy Volatility",
-                    "Trades",
-                    "Assumed TAC",
-                    "Annualized Buy and Hold Return",
-                    "Annualized Buy and Hold Volatility",
-                ],
-                [
+            "values": (
+                _METRIC_NAMES,
+                (
                     f"{portfolio_return:.2f}%",
                     f"{annualized_return:.2f}%",
                     f"{annualized_volatility:.2f}%",
-                    trades,
+                    str(trades),
                     f"{tac * 100:.2f}%",
                     f"{buy_and_hold_return:.2f}%",
                     f"{buy_and_hold_volatility:.2f}%",
-                ],
-            ],
+                ),
+            ),
             "align": "left",
         },
+        columnwidth=(2, 1),
     )
     return table
 
@@ -136,10 +142,10 @@ def _create_plot_layout(title):
     return layout
 
 
-def _calculate_portfolio_return(stock):
-    """Calculate the total return of the stock."""
-    initial_value = stock.iloc[0]
-    final_value = stock.iloc[-1]
+def _calculate_portfolio_return(values):
+    """Calculate the total return of the values (np.ndarray)."""
+    initial_value = values[0]
+    final_value = values[-1]
 
     if initial_value == 0:
         return float("nan")
@@ -149,56 +155,59 @@ def _calculate_portfolio_return(stock):
     return portfolio_return
 
 
-def _calculate_annualized_return(stock):
-    """Calculate the annualized return for a stock."""
-    total_return = _calculate_portfolio_return(stock) / 100
-    years = _calculate_years(stock.index)
+def _calculate_annualized_return(portfolio_return, years):
+    """Calculate the annualized return from the total return (in %) over the years."""
+    total_return = portfolio_return / 100
 
     if years == 0:
         return 0
 
-    annualized_return = ((1 + total_return) ** (1 / years) - 1) * 100
+    # Equals '(1 + total_return) ** (1 / years) - 1' without losing the digits of
+    # small returns to the rounding of '1 + total_return'.
+    annualized_return = np.expm1(np.log1p(total_return) / years) * 100
     return annualized_return
 
 
 def _calculate_years(stock_index):
     """Calculate the number of years between the first and last date of a stock."""
-    total_seconds = (stock_index[-1] - stock_index[0]).total_seconds()
-    years = total_seconds / pd.Timedelta(days=365).total_seconds()
+    # Dividing datetime64 values respects the index unit (ns, or us after Arrow).
+    dates = stock_index.to_numpy()
+    years = (dates[-1] - dates[0]) / np.timedelta64(365, "D")
     return years
 
 
 def _calculate_trades(shares):
     """Calculate the number of trades by counting changes in the shares held."""
-    trades = shares.diff().fillna(0).ne(0).sum()
+    shares = shares.to_numpy()
+    trades = int(np.count_nonzero(shares[1:] != shares[:-1]))
     return trades
 
 
-def _calculate_annualized_volatility(stock):
-    """Calculates the annualized volatility for a stock."""
-    if len(stock) <= 1:
+def _calculate_annualized_volatility(values, years):
+    """Calculates the annualized volatility of the values (np.ndarray)."""
+    if len(values) <= 1 or years == 0:
         return 0
 
-    daily_log_returns = np.log(stock / stock.shift(1)).dropna()
-    daily_volatility = daily_log_returns.std()
-    years = _calculate_years(stock.index)
+    daily_log_returns = np.diff(np.log(values))
+    # ddof=1 matches the sample standard deviation of 'pd.Series.std'.
+    daily_volatility = daily_log_returns.std(ddof=1)
     days_per_year = 365 / years
 
-    if years == 0:
-        return 0
-
     annualized_volatility = daily_volatility * np.sqrt(days_per_year) * 100
     return annualized_volatility
 
 
 def _buy_and_hold_strategy(initial_cash, prices):
-    """Calculates the portfolio development using a buy and hold strategy."""
-    first_price = prices.iloc[0]
+    """Calculates the buy and hold portfolio development of the prices (np.ndarray)."""
+    first_price = prices[0]
 
+    # Keep an array, so the metrics and the table show NaN instead of failing.
     if first_price == 0:
-        return 0
+        return np.full(len(prices), np.nan)
 
     shares = np.floor(initial_cash / first_price)
     not_invested_cash = initial_cash - shares * first_price
-    portfolio_buy_and_hold = shares * prices + not_invested_cash
+    # Adding the cash in place saves the temporary of 'shares * prices'.
+    portfolio_buy_and_hold = shares * prices
+    portfolio_buy_and_hold += not_invested_cash
     return portfolio_buy_and_hold
@@ -1,8 +1,8 @@
 """This script deploys functions to visualize the trading signals."""
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 
 pd.options.mode.copy_on_write = True
 pd.options.future.infer_string = True
@@ -24,32 +24,16 @@ def plot_signals(data, title):
     # checked in 'download_data.py'.
     data["signal_plot"] = _map_signals_for_plotting(data["signal"])
 
-    fig = make_subplots(
-        rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.1
+    # The traces and the subplot layout are assembled directly, since
+    # 'make_subplots' and 'add_trace' take most of the time of building the figure.
+    candlestick_trace = _create_candlestick_trace(
+        data[["Open", "High", "Low", "Close"]]
     )
-
-    fig.add_trace(
-        _create_candlestick_trace(data[["Open", "High", "Low", "Close"]]), row=1, col=1
-    )
-
     buy_trace, sell_trace = _create_signal_traces(data["signal_plot"])
-    fig.add_trace(buy_trace, row=2, col=1)
-    fig.add_trace(sell_trace, row=2, col=1)
-
-    fig.update_layout(
-        title=title,
-        xaxis_title="Date",
-        yaxis_title="Stock",
-        xaxis_rangeslider_visible=False,
-        legend_title="Legend",
-    )
 
-    fig.update_yaxes(
-        title_text="Signal",
-        row=2,
-        col=1,
-        tickvals=[-1, 0, 1],
-        ticktext=["Sell", "", "Buy"],
+    fig = go.Figure(
+        data=[candlestick_trace, buy_trace, sell_trace],
+        layout=_create_plot_layout(title),
     )
 
     return fig
@@ -57,38 +41,75 @@ def plot_signals(data, title):
 
 def _map_signals_for_plotting(signal):
     """Map signals to -1, 0, 1 for plotting."""
-    signal_mapping = {0: 0, 1: -1, 2: 1}
-    return signal.map(signal_mapping)
+    # Signals 0 (hold), 1 (sell) and 2 (buy) index directly into the lookup table.
+    signal_mapping = np.array([0, -1, 1], dtype=np.int8)
+    return pd.Series(signal_mapping[signal.to_numpy()], index=signal.index)
 
 
 def _create_candlestick_trace(df):
     """Create candlestick trace for stock data."""
+    # Plotly serializes ndarrays much faster than a DatetimeIndex or Series.
     return go.Candlestick(
-        x=df.index,
-        open=df["Open"],
-        high=df["High"],
-        low=df["Low"],
-        close=df["Close"],
+        x=df.index.to_numpy(),
+        open=df["Open"].to_numpy(),
+        high=df["High"].to_numpy(),
+        low=df["Low"].to_numpy(),
+        close=df["Close"].to_numpy(),
         name="Stock",
     )
 
 
 def _create_signal_traces(signal_plot):
     """Create signal bar traces for buy and sell signals."""
-    buy_signals = signal_plot > 0
+    signals = signal_plot.to_numpy()
+    dates = signal_plot.index.to_numpy()
+
+    buy_signals = np.flatnonzero(signals > 0)
     buy_trace = go.Bar(
-        x=signal_plot.index[buy_signals],
-        y=signal_plot[buy_signals],
+        x=dates[buy_signals],
+        y=signals[buy_signals],
         marker_color="green",
         name="Buy Signal",
+        xaxis="x2",
+        yaxis="y2",
     )
 
-    sell_signals = signal_plot < 0
+    sell_signals = np.flatnonzero(signals < 0)
     sell_trace = go.Bar(
-        x=signal_plot.index[sell_signals],
-        y=signal_plot[sell_signals],
+        x=dates[sell_signals],
+        y=signals[sell_signals],
         marker_color="red",
         name="Sell Signal",
+        xaxis="x2",
+        yaxis="y2",
     )
 
     return buy_trace, sell_trace
+
+
+def _create_plot_layout(title):
+    """Create the layout with the candlestick chart above the signal bars."""
+    # Same grid as 'make_subplots' with row heights 0.7 and 0.3, vertical spacing 0.1
+    # and shared x-axes.
+    layout = {
+        "xaxis": {
+            "anchor": "y",
+            "domain": [0.0, 1.0],
+            "matches": "x2",
+            "showticklabels": False,
+            "rangeslider": {"visible": False},
+            "title": {"text": "Date"},
+        },
+        "yaxis": {"anchor": "x", "domain": [0.37, 1.0], "title": {"text": "Stock"}},
+        "xaxis2": {"anchor": "y2", "domain": [0.0, 1.0]},
+        "yaxis2": {
+            "anchor": "x2",
+            "domain": [0.0, 0.27],
+            "title": {"text": "Signal"},
+            "tickvals": [-1, 0, 1],
+            "ticktext": ["Sell", "", "Buy"],
+        },
+        "title": {"text": title},
+        "legend": {"title": {"text": "Legend"}},
+    }
+    return layout
@@ -1,40 +1,29 @@
 """This script deploys a task to plot the backtested portfolio and trading signals."""
 
-import itertools
-
-import pandas as pd
+import pyarrow as pa
 import pytask
+from pyarrow import feather, ipc
 
-from backtest_bay.config import (
-    BLD,
-    END_DATE,
-    INITIAL_CASH,
-    INTERVAL,
-    SRC,
-    START_DATE,
-    STOCKS,
-    STRATEGIES,
-    TAC,
-)
+from backtest_bay.config import BLD, INITIAL_CASH, PARAMS, SRC, TAC
 from backtest_bay.plot.plot_portfolio import plot_portfolio
 from backtest_bay.plot.plot_signals import plot_signals
 
-scripts = [
+scripts = (
     SRC / "config.py",
     SRC / "plot" / "plot_signals.py",
     SRC / "plot" / "plot_portfolio.py",
-]
-
-params_to_plot = pd.DataFrame(
-    list(itertools.product(STOCKS, [START_DATE], [END_DATE], [INTERVAL], STRATEGIES)),
-    columns=["stock", "start_date", "end_date", "interval", "strategy"],
 )
 
-for row in params_to_plot.itertuples(index=False):
-    id_backtest = (
-        f"{row.stock}_{row.start_date}_{row.end_date}_{row.interval}_{row.strategy}"
-    )
-    backtest_path = BLD / "backtest" / f"{id_backtest}.pkl"
+# Columns drawn by 'plot_signals' and 'plot_portfolio'.
+PLOT_COLUMNS = ["Open", "High", "Low", "Close", "signal", "shares", "cash", "assets"]
+
+# Load plotly.js from its CDN instead of embedding the ~3 MB bundle in every file.
+# The figures are built by this package, so Plotly's validation can be skipped.
+HTML_OPTIONS = {"include_plotlyjs": "cdn", "validate": False, "auto_open": False}
+
+for row in PARAMS:
+    id_backtest = "_".join(row)
+    backtest_path = BLD / "backtest" / f"{id_backtest}.arrow"
     plot_path = f"{row.stock}_{row.start_date}_{row.end_date}_{row.interval}"
     produces = {
         "plot_signals": BLD / "plot" / plot_path / f"plot_signals_{row.strategy}.html",
@@ -52,8 +41,15 @@ for row in params_to_plot.itertuples(index=False):
         id_backtest=id_backtest,
     ):
         """Task to plot the backtested portfolio and trading signals."""
-        portfolio = pd.read_pickle(backtest_path)
+        portfolio = _read_plot_columns(backtest_path)
         fig = plot_signals(portfolio, id_backtest)
-        fig.write_html(produces.get("plot_signals"))
+        fig.write_html(produces.get("plot_signals"), **HTML_OPTIONS)
         fig = plot_portfolio(portfolio, id_backtest, TAC, INITIAL_CASH)
-        fig.write_html(produces.get("plot_portfolio"))
+        fig.write_html(produces.get("plot_portfolio"), **HTML_OPTIONS)
+
+
+def _read_plot_columns(path):
+    """Read the plotted columns and the index of a backtested portfolio."""
+    with pa.memory_map(str(path)) as source:
+        index_columns = ipc.open_file(source).schema.pandas_metadata["index_columns"]
+    return feather.read_feather(path, columns=[*index_columns, *PLOT_COLUMNS])
@@ -1,155 +1,232 @@
+import numba
+import numpy as np
 import pandas as pd
 import pandas.testing as pdt
 import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from hypothesis.extra import numpy as hnp
+from numba import njit
 
 from backtest_bay.backtest.backtest_signals import (
-    _execute_buy,
-    _execute_sell,
-    _is_buy_trade_affordable,
-    _is_sell_trade_affordable,
-    _update_portfolio,
     _validate_initial_cash,
     _validate_price_col,
+    _validate_signals,
     _validate_tac,
     _validate_trade_pct,
     backtest_signals,
+    backtest_signals_multi,
     merge_data_with_backtest_portfolio,
+    validate_trading_params,
 )
 
+PORTFOLIO_DTYPES = {
+    "price": "float64",
+    "signal": "int8",
+    "shares": "int64",
+    "holdings": "float64",
+    "cash": "float64",
+    "assets": "float64",
+}
+
+INDEX = pd.date_range("2023-01-01", periods=5, freq="D")
+DATA = pd.DataFrame({"Close": [10, 5, 10, 8, 10]}, index=INDEX)
+
+BUY = 2
+SELL = 1
+
 
 # tests for backtest_signals
-def test_backtest_portfolio_correct_calculation():
+@pytest.mark.parametrize(
+    ("signals", "expected"),
+    [
+        # Only hold
+        (
+            [0, 0, 0, 0, 0],
+            [
+                [10, 5, 10, 8, 10],  # price
+                [0, 0, 0, 0, 0],  # signal
+                [0, 0, 0, 0, 0],  # shares
+                [0, 0, 0, 0, 0],  # holdings
+                [100, 100, 100, 100, 100],  # cash
+                [100, 100, 100, 100, 100],  # assets
+            ],
+        ),
+        # Buy once
+        (
+            [0, 2, 0, 0, 0],
+            [
+                [10, 5, 10, 8, 10],
+                [0, 2, 0, 0, 0],
+                [0, 20, 20, 20, 20],
+                [0, 100, 200, 160, 200],
+                [100, 0, 0, 0, 0],
+                [100, 100, 200, 160, 200],
+            ],
+        ),
+        # Buy and sell once
+        (
+            [0, 2, 0, 0, 1],
+            [
+                [10, 5, 10, 8, 10],
+                [0, 2, 0, 0, 1],
+                [0, 20, 20, 20, 4],
+                [0, 100, 200, 160, 40],
+                [100, 0, 0, 0, 160],
+                [100, 100, 200, 160, 200],
+            ],
+        ),
+    ],
+)
+def test_backtest_portfolio_correct_calculation(signals, expected):
     """Test backtest_portfolio for correct calculation."""
-    index = pd.date_range("2023-01-01", periods=5, freq="D")
-    data = pd.DataFrame({"Close": [10, 5, 10, 8, 10]}, index=index)
-
-    # Only hold
-    signals = pd.Series([0, 0, 0, 0, 0])
     portfolio = backtest_signals(
-        data, signals, initial_cash=100, tac=0, trade_pct=1.0, price_col="Close"
+        DATA, pd.Series(signals), initial_cash=100, tac=0, trade_pct=1.0
     )
-    expected_portfolio = pd.DataFrame(
-        data={
-            "price": [10, 5, 10, 8, 10],
-            "signal": [0, 0, 0, 0, 0],
-            "shares": [0, 0, 0, 0, 0],
-            "holdings": [0, 0, 0, 0, 0],
-            "cash": [100, 100, 100, 100, 100],
-            "assets": [100, 100, 100, 100, 100],
-        },
-        index=index,
+    np.testing.assert_allclose(
+        portfolio[list(PORTFOLIO_DTYPES)].to_numpy(dtype=np.float64),
+        np.array(expected, dtype=np.float64).T,
     )
-    pdt.assert_frame_equal(portfolio, expected_portfolio)
 
-    # Buy once
-    signals = pd.Series([0, 2, 0, 0, 0])
+
+def test_backtest_portfolio_dtypes_and_index():
+    """Test that backtest_portfolio keeps the data index and the column dtypes."""
     portfolio = backtest_signals(
-        data, signals, initial_cash=100, tac=0, trade_pct=1.0, price_col="Close"
+        DATA, pd.Series([0, 2, 0, 0, 1]), initial_cash=100, tac=0, trade_pct=1.0
+    )
+    pdt.assert_index_equal(portfolio.index, INDEX)
+    assert portfolio.dtypes.astype(str).to_dict() == PORTFOLIO_DTYPES
+
+
+@njit(cache=True)
+def _backtest_ref(prices, signals, initial_cash, tac, trade_pct):
+    """Reference state machine for the backtest with one branch per signal."""
+    n = len(prices)
+    cash_out = np.empty(n)
+    shares_out = np.empty(n)
+    cash = initial_cash
+    shares = 0.0
+    assets = initial_cash
+    for i in range(n):
+        price = prices[i]
+        trade_vol = trade_pct * assets
+        if signals[i] == BUY:
+            cost_per_share = price * (1 + tac)
+            buy_shares = np.floor(trade_vol / cost_per_share)
+            if buy_shares >= 1 and cash >= buy_shares * cost_per_share:
+                cash -= buy_shares * cost_per_share
+                shares += buy_shares
+        elif signals[i] == SELL and shares >= 1:
+            proceeds_per_share = price * (1 - tac)
+            sell_shares = min(np.floor(trade_vol / proceeds_per_share), shares)
+            cash += sell_shares * proceeds_per_share
+            shares -= sell_shares
+        assets = cash + shares * price
+        cash_out[i] = cash
+        shares_out[i] = shares
+    return cash_out, shares_out
+
+
+@settings(max_examples=50, deadline=None)
+@given(
+    data=st.data(),
+    tac=st.sampled_from([0.0, 0.005, 0.1]),
+    trade_pct=st.sampled_from([0.05, 0.5, 1.0]),
+)
+def test_backtest_signals_matches_reference_state_machine(data, tac, trade_pct):
+    """Test backtest_signals on random prices and signals against a reference."""
+    n = data.draw(st.integers(1, 500), label="n")
+    prices = data.draw(
+        hnp.arrays(np.float64, n, elements=st.floats(1, 1_000)), label="prices"
     )
-    expected_portfolio = pd.DataFrame(
-        data={
-            "price": [10, 5, 10, 8, 10],
-            "signal": [0, 2, 0, 0, 0],
-            "shares": [0, 20, 20, 20, 20],
-            "holdings": [0, 100, 200, 160, 200],
-            "cash": [100, 0, 0, 0, 0],
-            "assets": [100, 100, 200, 160, 200],
-        },
-        index=index,
+    signals = data.draw(
+        hnp.arrays(np.int8, n, elements=st.integers(0, 2)), label="signals"
     )
-    pdt.assert_frame_equal(portfolio, expected_portfolio)
 
-    # Buy and sell once
-    signals = pd.Series([0, 2, 0, 0, 1])
     portfolio = backtest_signals(
-        data, signals, initial_cash=100, tac=0, trade_pct=1.0, price_col="Close"
+        pd.DataFrame({"Close": prices}),
+        pd.Series(signals),
+        initial_cash=10_000,
+        tac=tac,
+        trade_pct=trade_pct,
     )
-    expected_portfolio = pd.DataFrame(
-        data={
-            "price": [10, 5, 10, 8, 10],
-            "signal": [0, 2, 0, 0, 1],
-            "shares": [0, 20, 20, 20, 4],
-            "holdings": [0, 100, 200, 160, 40],
-            "cash": [100, 0, 0, 0, 160],
-            "assets": [100, 100, 200, 160, 200],
-        },
-        index=index,
-    )
-    pdt.assert_frame_equal(portfolio, expected_portfolio)
-
-
-# tests for _is_buy_affordable
-def test_is_buy_trade_affordable_enough_cash():
-    """Test buying when there is enough cash."""
-    affordable = _is_buy_trade_affordable(buy_shares=2, cost=10, cash=10)
-    assert affordable
 
+    expected_cash, expected_shares = _backtest_ref(
+        prices, signals, 10_000.0, tac, trade_pct
+    )
+    np.testing.assert_allclose(portfolio["cash"].to_numpy(), expected_cash, rtol=1e-9)
+    np.testing.assert_array_equal(portfolio["shares"].to_numpy(), expected_shares)
+
+
+# tests for backtest_signals_multi
+def test_backtest_signals_multi_equals_single_backtests():
+    """Test backtest_signals_multi against backtest_signals per strategy."""
+    signals = pd.DataFrame(
+        {
+            "hold": [0, 0, 0, 0, 0],
+            "buy": [0, 2, 0, 0, 0],
+            "buy_and_sell": [0, 2, 0, 0, 1],
+        }
+    )
 
-def test_is_buy_trade_affordable_not_enough_cash():
-    """Test buying when there is not enough cash."""
-    affordable = _is_buy_trade_affordable(buy_shares=2, cost=10, cash=9)
-    assert not affordable
-
+    portfolios = backtest_signals_multi(
+        DATA, signals, initial_cash=100, tac=0.01, trade_pct=0.5
+    )
 
-# tests for _execute_buy
-def test_execute_buy_enough_cash():
-    """Test buying when there is enough cash to purchase at least one share."""
-    cash, shares = _execute_buy(cash=30, price=2, shares=2, trade_vol=30, tac=0.5)
-    expected_cash, expected_shares = 0, 12
-    assert cash == expected_cash
-    assert shares == expected_shares
+    assert list(portfolios) == ["hold", "buy", "buy_and_sell"]
+    for strategy, portfolio in portfolios.items():
+        expected_portfolio = backtest_signals(
+            DATA, signals[strategy], initial_cash=100, tac=0.01, trade_pct=0.5
+        )
+        pdt.assert_frame_equal(portfolio, expected_portfolio)
 
 
-def test_execute_buy_to_less_cash():
-    """Test buying when there isn't enough cash to purchase at least one share."""
-    cash, shares = _execute_buy(cash=20, price=2, shares=2, trade_vol=30, tac=0.5)
-    expected_cash, expected_shares = 20, 2
-    assert cash == expected_cash
-    assert shares == expected_shares
+def test_backtest_signals_multi_portfolios_are_independent():
+    """Test that the returned portfolios do not share memory with the inputs."""
+    first_price = 10.0
+    data = pd.DataFrame({"Close": [first_price, 5.0, 10.0]})
+    signals = pd.DataFrame({"a": [0, 2, 0], "b": [0, 0, 0]}, dtype="int8")
 
+    portfolios = backtest_signals_multi(
+        data, signals, initial_cash=100, tac=0.01, trade_pct=0.5
+    )
+    portfolios["a"].loc[0, ["price", "signal"]] = 1
 
-# tests for _is_sell_trade_affordable
-def test_is_sell_trade_affordable_enough_shares():
-    """Test selling when there are enough shares."""
-    affordable = _is_sell_trade_affordable(shares=1)
-    assert affordable
+    assert data.loc[0, "Close"] == first_price
+    assert signals.loc[0, "a"] == 0
+    assert portfolios["b"].loc[0, "price"] == first_price
 
 
-def test_is_sell_trade_affordable_not_enough_shares():
-    """Test selling when there are not enough shares."""
-    affordable = _is_sell_trade_affordable(shares=0)
-    assert not affordable
+def test_backtest_signals_multi_keeps_num_threads():
+    """Test that the process-wide Numba thread count is left to the caller."""
+    data = pd.DataFrame({"Close": [10, 5, 10]})
+    signals = pd.DataFrame({"buy": [0, 2, 0]})
+    num_threads = numba.get_num_threads()
 
+    backtest_signals_multi(data, signals, initial_cash=100, tac=0.01, trade_pct=0.5)
 
-# tests for _execute_sell
-def test_execute_sell_enough_shares():
-    """Test selling when there are enough shares."""
-    cash, shares = _execute_sell(cash=40, price=2, shares=50, trade_vol=30, tac=0.5)
-    expected_cash, expected_shares = 70, 20
-    assert cash == expected_cash
-    assert shares == expected_shares
+    assert numba.get_num_threads() == num_threads
 
-    cash, shares = _execute_sell(cash=40, price=2, shares=8, trade_vol=30, tac=0.5)
-    expected_cash, expected_shares = 48, 0
-    assert cash == expected_cash
-    assert shares == expected_shares
 
+# Tests for validate_trading_params
+def test_validate_trading_params_valid_input():
+    validate_trading_params(initial_cash=1000, tac=0.01, trade_pct=0.5)
 
-def test_execute_sell_not_enough_shares():
-    """Test selling when there are not enough shares."""
-    cash, shares = _execute_sell(cash=40, price=2, shares=0, trade_vol=30, tac=0.5)
-    expected_cash, expected_shares = 40, 0
-    assert cash == expected_cash
-    assert shares == expected_shares
 
+def test_backtest_signals_skips_validated_trading_params():
+    data = pd.DataFrame({"Close": [10, 5, 10]})
+    signals = pd.Series([0, 2, 0])
+    with pytest.raises(TypeError, match="trade_pct must be a float"):
+        backtest_signals(data, signals, initial_cash=100, tac=0.01, trade_pct=1)
 
-# tests for _update_portfolio
-def test_update_portfolio_correct_calculation():
-    """Test _update_portfolio for correct calculation."""
-    assets, holdings = _update_portfolio(cash=100, shares=5, price=20)
-    expected_assets, expected_holdings = 200, 100
-    assert assets == expected_assets
-    assert holdings == expected_holdings
+    backtest_signals(
+        data,
+        signals,
+        initial_cash=100,
+        tac=0.01,
+        trade_pct=1,
+        trading_params_validated=True,
+    )
 
 
 # Tests for _validate_initial_cash
@@ -228,6 +305,37 @@ def test_validate_data_valid_input(data, price_col):
     _validate_price_col(data, price_col)
 
 
+# Tests for _validate_signals
+@pytest.mark.parametrize(
+    "signals",
+    [
+        pd.Series([0, 1, 2]),
+        pd.Series([2, 2, 2], dtype="int8"),
+        [0, 0, 0],
+    ],
+)
+def test_validate_signals_valid_input(signals):
+    """Test valid signals for _validate_signals."""
+    data = pd.DataFrame({"Close": [100, 101, 102]})
+    _validate_signals(data, signals)
+
+
+@pytest.mark.parametrize(
+    ("signals", "expected_error"),
+    [
+        (pd.Series([0.0, 1.0, 2.0]), "signals must contain integers, got float64."),
+        (pd.Series([0, 1]), "signals must have the same length as data, got 2 and 3."),
+        (pd.Series([0, 1, 3]), "signals must only contain 0, 1 or 2."),
+        (pd.Series([0, -1, 2]), "signals must only contain 0, 1 or 2."),
+    ],
+)
+def test_validate_signals_invalid_input(signals, expected_error):
+    """Test invalid signals for _validate_signals."""
+    data = pd.DataFrame({"Close": [100, 101, 102]})
+    with pytest.raises((TypeError, ValueError), match=expected_error):
+        _validate_signals(data, signals)
+
+
 # Tests for merge_data_with_backtest_portfolio
 @pytest.mark.parametrize(
     ("data", "portfolio", "expected"),
@@ -246,9 +354,19 @@ def test_validate_data_valid_input(data, price_col):
                 {"price": [5, 44], "signal": [1, 1]}, index=["2023-05-01", "2023-05-08"]
             ),
         ),
+        (
+            pd.DataFrame({"price": [5, 44]}, index=["2023-05-01", "2023-05-08"]),
+            pd.DataFrame({"signal": [1.0, 0.0]}, index=["2023-05-08", "2023-05-09"]),
+            pd.DataFrame(
+                {"price": [5, 44], "signal": [float("nan"), 1.0]},
+                index=["2023-05-01", "2023-05-08"],
+            ),
+        ),
     ],
 )
 def test_merge_data_with_backtest_portfolio(data, portfolio, expected):
     "Test correct merge for merge_data_with_backtest_portfolio."
     result = merge_data_with_backtest_portfolio(data, portfolio)
-    result.equals(expected)
+    np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+    assert list(result.columns) == list(expected.columns)
+    assert list(result.index) == list(expected.index)
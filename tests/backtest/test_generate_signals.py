@@ -1,160 +1,376 @@
+from contextlib import nullcontext
+
 import numpy as np
 import pandas as pd
 import pytest
+from numba import njit
 
 from backtest_bay.backtest.generate_signals import (
     _bollinger_signals,
+    _macd,
     _macd_signals,
     _roc_signals,
+    _rolling_mean_std,
+    _rsi,
     _rsi_signals,
+    _signals_from_conditions,
     _validate_input_method,
     _validate_input_num_std_dev,
     _validate_input_window,
     _validate_window_relationships,
+    generate_signals,
 )
 
+# Geometric random walk shared by the oracle tests.
+RANDOM_WALK = 100 * np.exp(np.random.default_rng(0).normal(0, 0.01, 10_000).cumsum())
+
+# Constant float64 prices keyed by (length, price). They are read-only, so a test
+# cannot alter the inputs of the next one.
+CONSTANT_PRICES = {
+    (n, v): np.full(n, v, dtype=np.float64) for n in (4, 5, 7) for v in (1.0, 100.0)
+}
+for _prices in CONSTANT_PRICES.values():
+    _prices.flags.writeable = False
+
+# Read-only linear price ramp shared by the window tests.
+RAMP = np.linspace(100.0, 200.0, 25)
+RAMP.flags.writeable = False
+
+
+def _flat_with_spike(n, base, spike_idx, spike_val):
+    """Constant float64 prices with a single deviating price."""
+    prices = np.full(n, base)
+    prices[spike_idx] = spike_val
+    return prices
+
+
+# Independent reference implementations used as test oracles for the signals.
+@njit(cache=True, nogil=True)
+def _kahan_add(total, compensation, value):
+    """Add value to a Kahan-compensated running sum."""
+    y = value - compensation
+    t = total + y
+    compensation = (t - total) - y
+    return t, compensation
+
+
+@njit(cache=True, nogil=True)
+def _bollinger_ref(prices, window, num_std_dev):
+    """Bollinger Band signals from a running sum and sum of squares.
+
+    Unlike the Welford update of '_rolling_mean_std', every window is updated by
+    adding the newest and removing the oldest price from Kahan-compensated sums.
+
+    Args:
+        prices (np.ndarray): Array of asset prices without NaN.
+        window (int): Window size for Bollinger Bands calculation.
+        num_std_dev (float): Number of standard deviations for the bands.
+
+    Returns:
+        np.ndarray: Trading signals (2: buy, 1: sell, 0: do nothing) on the bar
+            they are generated.
+    """
+    signals = np.zeros(len(prices), dtype=np.int8)
+    sum_x, comp_x = 0.0, 0.0
+    sum_x2, comp_x2 = 0.0, 0.0
+    for i in range(len(prices)):
+        sum_x, comp_x = _kahan_add(sum_x, comp_x, prices[i])
+        sum_x2, comp_x2 = _kahan_add(sum_x2, comp_x2, prices[i] * prices[i])
+        if i >= window:
+            old = prices[i - window]
+            sum_x, comp_x = _kahan_add(sum_x, comp_x, -old)
+            sum_x2, comp_x2 = _kahan_add(sum_x2, comp_x2, -old * old)
+        if i < window - 1:
+            continue
+
+        mean = sum_x / window
+        variance = max((sum_x2 - window * mean * mean) / (window - 1), 0.0)
+        band = num_std_dev * np.sqrt(variance)
+        if prices[i] < mean - band:
+            signals[i] = 2
+        elif prices[i] > mean + band:
+            signals[i] = 1
+    return signals
+
+
+@njit(cache=True, nogil=True)
+def _rsi_signals_ref(prices, window):
+    """RSI signals from Wilder's recursion on unnormalized gain and loss sums.
+
+    'AU = AU * (n - 1) / n + max(delta, 0)' is the average gain of '_rsi' scaled by
+    the window, so the RSI follows as '100 * AU / (AU + AD)'. Both sums start at
+    zero like in '_rsi'.
+
+    Args:
+        prices (np.ndarray): Array of asset prices without NaN.
+        window (int): Window size for computing RSI.
+
+    Returns:
+        np.ndarray: Trading signals (2: buy, 1: sell, 0: do nothing) on the bar
+            they are generated.
+    """
+    signals = np.zeros(len(prices), dtype=np.int8)
+    decay = (window - 1) / window
+    lower_cutoff = 30
+    upper_cutoff = 70
+    up = 0.0
+    down = 0.0
+    for i in range(1, len(prices)):
+        delta = prices[i] - prices[i - 1]
+        up = up * decay + max(delta, 0.0)
+        down = down * decay + max(-delta, 0.0)
+        if up + down == 0:
+            continue
+
+        rsi = 100 * up / (up + down)
+        if rsi < lower_cutoff:
+            signals[i] = 2
+        elif rsi > upper_cutoff:
+            signals[i] = 1
+    return signals
+
+
+# Tests for generate_signals
+def test_generate_signals_lags_signals_by_one_period():
+    index = pd.date_range("2020-01-01", periods=4)
+    data = pd.DataFrame({"Close": [2, 3, 3, 3]}, index=index)
+    signals = generate_signals(data, method="roc", window=2)
+    expected = pd.Series([0, 0, 2, 0], index=index, dtype=np.int8)
+    pd.testing.assert_series_equal(signals, expected)
+
 
 # Tests for _bollinger_signals
-def test_bollinger_signals_correct_calculation():
-    # do nothing
-    prices = pd.Series([100, 100, 100, 100, 100])
+@pytest.mark.parametrize(
+    ("prices", "expected"),
+    [
+        # do nothing
+        (CONSTANT_PRICES[5, 100.0], [0, 0, 0, 0, 0]),
+        # buy signal
+        ([100, 100, 50, 50, 50], [0, 0, 2, 0, 0]),
+        # sell signal
+        ([100, 100, 200, 200, 200], [0, 0, 1, 0, 0]),
+    ],
+)
+def test_bollinger_signals_correct_calculation(prices, expected):
+    prices = np.array(prices, dtype=np.float64)
     signals = _bollinger_signals(prices, window=2, num_std_dev=0.5)
-    expected = pd.Series([0] * 5)
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array(expected, dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
+
+
+@pytest.mark.parametrize(
+    ("spike_val", "expected_signal"),
+    [
+        # dip below the lower band
+        (90.0, 2),
+        # spike above the upper band
+        (110.0, 1),
+    ],
+)
+def test_bollinger_signals_spike_after_flat_window(spike_val, expected_signal):
+    prices = _flat_with_spike(22, base=100.0, spike_idx=20, spike_val=spike_val)
+    signals = _bollinger_signals(prices, window=20, num_std_dev=2)
+    expected = np.zeros(22, dtype=np.int8)
+    expected[20] = expected_signal
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
-    # buy signal
-    prices = pd.Series([100, 100, 50, 50, 50])
-    signals = _bollinger_signals(prices, window=2, num_std_dev=0.5)
-    expected = pd.Series([0, 0, 0, 2, 0])
-    pd.testing.assert_series_equal(signals, expected)
 
-    # sell signal
-    prices = pd.Series([100, 100, 200, 200, 200])
-    signals = _bollinger_signals(prices, window=2, num_std_dev=0.5)
-    expected = pd.Series([0, 0, 0, 1, 0])
-    pd.testing.assert_series_equal(signals, expected)
+@pytest.mark.parametrize(("window", "num_std_dev"), [(2, 0.5), (20, 2), (50, 1.5)])
+def test_bollinger_signals_matches_running_sum_oracle(window, num_std_dev):
+    signals = _bollinger_signals(RANDOM_WALK, window=window, num_std_dev=num_std_dev)
+    expected = _bollinger_ref(RANDOM_WALK, window, num_std_dev)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
 
 def test_bollinger_signals_window_effect():
-    prices = pd.Series(np.linspace(100, 200, 25))
+    prices = RAMP
     signals_small_window = _bollinger_signals(prices, window=2, num_std_dev=1)
     signals_large_window = _bollinger_signals(prices, window=20, num_std_dev=1)
-    assert not signals_small_window.equals(signals_large_window)
+    assert not np.array_equal(signals_small_window, signals_large_window)
+
+
+def test_bollinger_signals_no_signals_before_first_full_window():
+    prices = np.array([100, 50, 25, 10, 5, 1], dtype=float)
+    signals = _bollinger_signals(prices, window=5, num_std_dev=0.5)
+    np.testing.assert_array_equal(signals[:4], np.zeros(4, dtype=np.int8), strict=True)
 
 
 def test_bollinger_signals_single_price():
-    prices = pd.Series([100])
+    prices = np.array([100], dtype=float)
     signals = _bollinger_signals(prices, window=20, num_std_dev=2)
-    expected = pd.Series([0])
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
+
+
+# Tests for _rolling_mean_std
+@pytest.mark.parametrize(
+    ("prices", "window"),
+    [
+        (RAMP, 5),
+        (np.array([100.0, 101.5, np.nan, 99.0, 98.5, 102.0, 103.0]), 2),
+        (np.array([np.nan, 100.0, 101.0, 102.0]), 2),
+        (np.array([100.0]), 20),
+    ],
+)
+def test_rolling_mean_std_matches_pandas(prices, window):
+    moving_avg, std_dev = _rolling_mean_std(prices, window)
+    expected = pd.Series(prices).rolling(window=window)
+    np.testing.assert_allclose(moving_avg, expected.mean().to_numpy())
+    np.testing.assert_allclose(std_dev, expected.std().to_numpy(), atol=1e-9)
 
 
 # Tests for _macd_signals
 def test_macd_signals_correct_calculation():
     # do nothing
-    prices = pd.Series([1] * 7)
+    prices = CONSTANT_PRICES[7, 1.0]
     signals = _macd_signals(prices, short_window=2, long_window=3, signal_window=2)
-    expected = pd.Series([0] * 7)
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0] * 7, dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
     # buy signal
-    prices = pd.Series([1, 4, 8, 10, 12, 15, 20])
+    prices = np.array([1, 4, 8, 10, 12, 15, 20], dtype=float)
     signals = _macd_signals(prices, short_window=2, long_window=3, signal_window=2)
-    expected = pd.Series([0, 0, 2, 2, 2, 2, 2])
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0, 2, 2, 2, 2, 2, 2], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
     # sell signal
-    prices = pd.Series([20, 15, 12, 10, 8, 4, 1])
+    prices = np.array([20, 15, 12, 10, 8, 4, 1], dtype=float)
     signals = _macd_signals(prices, short_window=2, long_window=3, signal_window=2)
-    expected = pd.Series([0, 0, 1, 1, 1, 1, 1])
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0, 1, 1, 1, 1, 1, 1], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
 
 def test_macd_signals_window_effect():
-    prices = pd.Series([1, 2, 1, 1, 2, 5, 4, 2, 4, 2, 1] * 5)
+    prices = np.array([1, 2, 1, 1, 2, 5, 4, 2, 4, 2, 1] * 5, dtype=float)
     window_1 = _macd_signals(prices, short_window=4, long_window=10, signal_window=4)
     window_2 = _macd_signals(prices, short_window=4, long_window=15, signal_window=4)
     window_3 = _macd_signals(prices, short_window=4, long_window=10, signal_window=2)
-    assert not window_1.equals(window_2)
-    assert not window_1.equals(window_3)
-    assert not window_2.equals(window_3)
+    assert not np.array_equal(window_1, window_2)
+    assert not np.array_equal(window_1, window_3)
+    assert not np.array_equal(window_2, window_3)
 
 
 def test_macd_signals_single_price():
-    prices = pd.Series([100])
+    prices = np.array([100], dtype=float)
     signals = _macd_signals(prices, short_window=2, long_window=3, signal_window=2)
-    expected = pd.Series([0])
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
+
+
+# Tests for _macd
+def test_macd_matches_pandas_ewm():
+    prices = pd.Series([1, 2, 1, 1, 2, 5, 4, 2, 4, 2, 1] * 5, dtype=float)
+    macd_line, signal_line = _macd(prices.to_numpy(), 2 / 5, 2 / 11, 2 / 5)
+
+    short_ema = prices.ewm(span=4, adjust=False).mean()
+    long_ema = prices.ewm(span=10, adjust=False).mean()
+    expected_macd = short_ema - long_ema
+    expected_signal = expected_macd.ewm(span=4, adjust=False).mean()
+
+    np.testing.assert_allclose(macd_line, expected_macd.to_numpy(), atol=1e-12)
+    np.testing.assert_allclose(signal_line, expected_signal.to_numpy(), atol=1e-12)
 
 
 # Tests for _roc_signals
 def test_roc_signlas_correct_calculation():
     # do nothing
-    prices = pd.Series([1] * 4)
+    prices = CONSTANT_PRICES[4, 1.0]
     signals = _roc_signals(prices, window=2)
-    expected = pd.Series([0] * 4)
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0] * 4, dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
     # buy signal
-    prices = pd.Series([2, 3, 3, 3])
+    prices = np.array([2, 3, 3, 3], dtype=float)
     signals = _roc_signals(prices, window=2)
-    expected = pd.Series([0, 0, 2, 0])
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0, 2, 0, 0], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
     # sell signal
-    prices = pd.Series([2, 1, 1, 1])
+    prices = np.array([2, 1, 1, 1], dtype=float)
     signals = _roc_signals(prices, window=2)
-    expected = pd.Series([0, 0, 1, 0])
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0, 1, 0, 0], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
 
 def test_roc_signals_window_effect():
-    prices = pd.Series([2, 1, 1, 1])
+    prices = np.array([2, 1, 1, 1], dtype=float)
     window_1 = _roc_signals(prices, window=2)
     window_2 = _roc_signals(prices, window=3)
-    assert not window_1.equals(window_2)
+    assert not np.array_equal(window_1, window_2)
 
 
 def test_roc_signals_single_price():
-    prices = pd.Series([1])
+    prices = np.array([1], dtype=float)
     signals = _roc_signals(prices, window=2)
-    expected = pd.Series([0])
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
 
 # Tests for _rsi_signals
 def test_rsi_signlas_correct_calculation():
     # do nothing
-    prices = pd.Series([1] * 4)
+    prices = CONSTANT_PRICES[4, 1.0]
     signals = _rsi_signals(prices, window=2)
-    expected = pd.Series([0] * 4)
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0] * 4, dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
     # buy
-    prices = pd.Series([3, 2, 1, 0])
+    prices = np.array([3, 2, 1, 0], dtype=float)
     signals = _rsi_signals(prices, window=2)
-    expected = pd.Series([0, 0, 2, 2])
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0, 2, 2, 2], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
     # sell
-    prices = pd.Series([0, 1, 2, 3])
+    prices = np.array([0, 1, 2, 3], dtype=float)
     signals = _rsi_signals(prices, window=2)
-    expected = pd.Series([0, 0, 1, 1])
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0, 1, 1, 1], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
+
+
+@pytest.mark.parametrize("window", [2, 14, 21])
+def test_rsi_signals_matches_wilder_oracle(window):
+    signals = _rsi_signals(RANDOM_WALK, window=window)
+    expected = _rsi_signals_ref(RANDOM_WALK, window)
+    np.testing.assert_array_equal(signals, expected, strict=True)
 
 
 def test_rsi_signals_window_effect():
-    prices = pd.Series([5, 1, 2, 3, 4, 5])
+    prices = np.array([5, 1, 2, 3, 4, 5], dtype=float)
     window_1 = _rsi_signals(prices, window=2)
     window_2 = _rsi_signals(prices, window=3)
-    assert not window_1.equals(window_2)
+    assert not np.array_equal(window_1, window_2)
 
 
 def test_rsi_signals_single_price():
-    prices = pd.Series([100])
+    prices = np.array([100], dtype=float)
     signals = _rsi_signals(prices, window=2)
-    expected = pd.Series([0])
-    pd.testing.assert_series_equal(signals, expected)
+    expected = np.array([0], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
+
+
+# Tests for _signals_from_conditions
+def test_signals_from_conditions_correct_calculation():
+    buy = np.array([True, False, False, True])
+    sell = np.array([False, True, False, True])
+    signals = _signals_from_conditions(buy, sell)
+    expected = np.array([2, 1, 0, 1], dtype=np.int8)
+    np.testing.assert_array_equal(signals, expected, strict=True)
+
+
+# Tests for _rsi
+@pytest.mark.parametrize(
+    ("prices", "window", "expected"),
+    [
+        ([1.0, 1.0, 1.0], 2, [np.nan, np.nan, np.nan]),
+        ([1.0, 2.0, 3.0], 2, [np.nan, 100.0, 100.0]),
+        ([3.0, 2.0, 1.0], 2, [np.nan, 0.0, 0.0]),
+        ([1.0, 3.0, 2.0], 2, [np.nan, 100.0, 50.0]),
+        ([1.0, np.nan, 2.0], 2, [np.nan, np.nan, np.nan]),
+    ],
+)
+def test_rsi_correct_calculation(prices, window, expected):
+    result = _rsi(np.array(prices), window)
+    np.testing.assert_allclose(result, expected)
 
 
 # Tests for _validate_window
@@ -233,20 +449,28 @@ def test_validate_window_relationships_invalid_relation():
 
 
 # Tests for _validate_input_method
-@pytest.mark.parametrize("method", ["bollinger", "macd", "roc", "rsi"])
-def test_validate_input_method_valid_input(method):
-    _validate_input_method(method)
-
-
-@pytest.mark.parametrize("method", [123, 3.14, True, None])
-def test_validate_input_method_invalid_type(method):
-    match = f"Invalid type for method: expected str, got {type(method).__name__}."
-    with pytest.raises(TypeError, match=match):
-        _validate_input_method(method)
-
-
-@pytest.mark.parametrize("method", ["invalid", "BoLLinger", "rsi_signal", ""])
-def test_validate_input_method_invalid_value(method):
-    match = f"Invalid method '{method}'."
-    with pytest.raises(ValueError, match=match):
+_TYPE_ERROR = "Invalid type for method: expected str, got {}."
+_VALUE_ERROR = "Invalid method '{}'."
+
+
+@pytest.mark.parametrize(
+    ("method", "exc", "match"),
+    [
+        ("bollinger", None, None),
+        ("macd", None, None),
+        ("roc", None, None),
+        ("rsi", None, None),
+        (123, TypeError, _TYPE_ERROR.format("int")),
+        (3.14, TypeError, _TYPE_ERROR.format("float")),
+        (True, TypeError, _TYPE_ERROR.format("bool")),
+        (None, TypeError, _TYPE_ERROR.format("NoneType")),
+        ("invalid", ValueError, _VALUE_ERROR.format("invalid")),
+        ("BoLLinger", ValueError, _VALUE_ERROR.format("BoLLinger")),
+        ("rsi_signal", ValueError, _VALUE_ERROR.format("rsi_signal")),
+        ("", ValueError, _VALUE_ERROR.format("")),
+    ],
+)
+def test_validate_input_method(method, exc, match):
+    ctx = pytest.raises(exc, match=match) if exc else nullcontext()
+    with ctx:
         _validate_input_method(method)
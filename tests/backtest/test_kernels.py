@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from backtest_bay.backtest._kernels import make_backtest_kernel
+
+
+# Tests for make_backtest_kernel
+def _run_kernel(prices, signals, initial_cash, tac, trade_pct):
+    n = len(prices)
+    shares = np.empty(n, dtype=np.int64)
+    holdings = np.empty(n, dtype=np.float64)
+    cash = np.empty(n, dtype=np.float64)
+    assets = np.empty(n, dtype=np.float64)
+    run = make_backtest_kernel(tac, trade_pct)
+    run(
+        np.array(prices, dtype=np.float64),
+        np.array(signals, dtype=np.int8),
+        initial_cash,
+        shares,
+        holdings,
+        cash,
+        assets,
+    )
+    return shares, holdings, cash, assets
+
+
+@pytest.mark.parametrize(
+    ("prices", "signals", "expected_shares", "expected_cash"),
+    [
+        # buy with enough cash
+        ([2], [2], [10], [0]),
+        # buy with too little trade volume for one share
+        ([100], [2], [0], [30]),
+        # sell all shares, capped at the shares held
+        ([2, 2], [2, 1], [10, 0], [0, 10]),
+        # sell without shares
+        ([2], [1], [0], [30]),
+    ],
+)
+def test_make_backtest_kernel_trades(prices, signals, expected_shares, expected_cash):
+    shares, _, cash, _ = _run_kernel(
+        prices, signals, initial_cash=30.0, tac=0.5, trade_pct=1.0
+    )
+    np.testing.assert_array_equal(shares, expected_shares)
+    np.testing.assert_array_equal(cash, expected_cash)
+
+
+def test_make_backtest_kernel_revalues_holdings_without_signal():
+    shares, holdings, cash, assets = _run_kernel(
+        [2, 4, 1], [2, 0, 0], initial_cash=30.0, tac=0.5, trade_pct=1.0
+    )
+    np.testing.assert_array_equal(shares, [10, 10, 10])
+    np.testing.assert_array_equal(holdings, [20, 40, 10])
+    np.testing.assert_array_equal(cash, [0, 0, 0])
+    np.testing.assert_array_equal(assets, [20, 40, 10])
+
+
+def _buy_then_sell_ref(cash, buy_price, sell_price, tac, trade_pct):
+    """Vectorized trade rules for a buy on the first and a sell on the second bar."""
+    buy_shares = np.floor(trade_pct * cash / (buy_price * (1 + tac)))
+    buy_cost = buy_shares * buy_price * (1 + tac)
+    do_buy = (buy_shares >= 1) & (cash >= buy_cost)
+    cash_after_buy = cash - np.where(do_buy, buy_cost, 0)
+    shares_after_buy = np.where(do_buy, buy_shares, 0)
+
+    # The trade volume is based on the assets valued at the previous bar.
+    assets = cash_after_buy + shares_after_buy * buy_price
+    sell_shares = np.minimum(
+        np.floor(trade_pct * assets / (sell_price * (1 - tac))), shares_after_buy
+    )
+    do_sell = shares_after_buy >= 1
+    cash_after_sell = cash_after_buy + np.where(
+        do_sell, sell_shares * sell_price * (1 - tac), 0
+    )
+    shares_after_sell = shares_after_buy - np.where(do_sell, sell_shares, 0)
+    return (
+        np.stack([shares_after_buy, shares_after_sell], axis=1),
+        np.stack([cash_after_buy, cash_after_sell], axis=1),
+    )
+
+
+def test_make_backtest_kernel_matches_vectorized_trade_rules():
+    tac = 0.01
+    trade_pct = 0.5
+    rng = np.random.default_rng(0)
+    n_cases = 500
+    cash = rng.uniform(1, 1_000, n_cases)
+    prices = rng.uniform(0.5, 200, (n_cases, 2))
+
+    expected_shares, expected_cash = _buy_then_sell_ref(
+        cash, prices[:, 0], prices[:, 1], tac, trade_pct
+    )
+    for case in range(n_cases):
+        shares, _, cash_out, _ = _run_kernel(
+            prices[case], [2, 1], cash[case], tac=tac, trade_pct=trade_pct
+        )
+        np.testing.assert_array_equal(shares, expected_shares[case])
+        np.testing.assert_allclose(cash_out, expected_cash[case], rtol=1e-12)
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--no-numba",
+        action="store_true",
+        help="Run the Numba kernels as plain Python (NUMBA_DISABLE_JIT=1).",
+    )
+
+
+def pytest_configure(config):
+    # Numba reads the variable on import, which happens when the tests are collected.
+    if config.getoption("--no-numba"):
+        os.environ["NUMBA_DISABLE_JIT"] = "1"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warmup_numba():
+    """Compile or load the cached Numba kernels before the first test runs.
+
+    The signal kernels have explicit signatures and are compiled on import. The
+    backtest kernels are only built on their first call, so one small backtest with
+    the trading parameters of 'config.py' builds them here.
+    """
+    from backtest_bay.backtest.backtest_signals import (
+        backtest_signals,
+        backtest_signals_multi,
+    )
+    from backtest_bay.backtest.generate_signals import (
+        _bollinger_signals,
+        _macd_signals,
+        _roc_signals,
+        _rsi_signals,
+    )
+    from backtest_bay.config import INITIAL_CASH, TAC, TRADE_PCT
+
+    _bollinger_signals(np.ones(32), window=20, num_std_dev=2)
+    _macd_signals(np.ones(32), short_window=2, long_window=3, signal_window=2)
+    _roc_signals(np.ones(8), window=2)
+    _rsi_signals(np.ones(8), window=2)
+
+    data = pd.DataFrame({"Close": [10.0, 5.0, 10.0]})
+    signals = pd.DataFrame({"strategy": [0, 2, 1]})
+    trading_params = {"initial_cash": INITIAL_CASH, "tac": TAC, "trade_pct": TRADE_PCT}
+    backtest_signals(data, signals["strategy"], **trading_params)
+    backtest_signals_multi(data, signals, **trading_params)
@@ -1,3 +1,5 @@
+import re
+
 import pandas as pd
 import pytest
 
@@ -20,51 +22,57 @@ def test_validate_symbol_invalid_non_string():
         _validate_symbol(123)
 
 
-# Tests for _validate_date_format
-@pytest.mark.parametrize(
-    "interval",
-    [
-        "1m",
-        "2m",
-        "5m",
-        "15m",
-        "30m",
-        "60m",
-        "90m",
-        "1h",
-        "1d",
-        "5d",
-        "1wk",
-        "1mo",
-        "3mo",
-    ],
+# Tests for _validate_interval
+VALID_INTERVALS = (
+    "1m",
+    "2m",
+    "5m",
+    "15m",
+    "30m",
+    "60m",
+    "90m",
+    "1h",
+    "1d",
+    "5d",
+    "1wk",
+    "1mo",
+    "3mo",
 )
-def test_validate_interval_valid(interval):
-    _validate_interval(interval)
 
 
-def test_validate_interval_invalid():
-    with pytest.raises(ValueError, match="Invalid interval.*"):
-        _validate_interval("10m")
+def test_validate_interval_valid():
+    for interval in VALID_INTERVALS:
+        _validate_interval(interval)
 
 
-@pytest.mark.parametrize("invalid_interval", [None, "", " "])
-def test_validate_interval_edge_cases(invalid_interval):
+@pytest.mark.parametrize("interval", ["10m", None, "", " "])
+def test_validate_interval_invalid(interval):
     with pytest.raises(ValueError, match="Invalid interval.*"):
-        _validate_interval(invalid_interval)
+        _validate_interval(interval)
+
+
+def test_validate_interval_and_date_format_without_regex(monkeypatch):
+    def _fail(*_args, **_kwargs):
+        error_msg = "Validation must not compile or match regular expressions."
+        raise AssertionError(error_msg)
+
+    for function in ("compile", "match", "fullmatch", "search"):
+        monkeypatch.setattr(re, function, _fail)
+    _validate_interval("1d")
+    _validate_date_format("2023-01-01")
 
 
 # tests for _validate_date_format
-@pytest.mark.parametrize(
-    "valid_date",
-    [
-        "2023-01-01",
-        "1999-12-31",
-        "2024-02-29",  # Leap year
-    ],
+VALID_DATES = (
+    "2023-01-01",
+    "1999-12-31",
+    "2024-02-29",  # Leap year
 )
-def test_validate_date_format_valid(valid_date):
-    _validate_date_format(valid_date)
+
+
+def test_validate_date_format_valid():
+    for valid_date in VALID_DATES:
+        _validate_date_format(valid_date)
 
 
 @pytest.mark.parametrize(
@@ -171,19 +179,28 @@ def test_validate_data_index_datetime_invalid(index):
 
 
 # Test for _validate_data_multiindex
-def test_validate_data_multiindex_valid():
+@pytest.mark.parametrize(
+    "columns",
+    [
+        # single ticker
+        pd.MultiIndex.from_arrays(
+            [["Close", "Open", "High", "Low"], ["AAPL"] * 4], names=["Type", "Ticker"]
+        ),
+        # single ticker with additional fields
+        pd.MultiIndex.from_arrays(
+            [["Adj Close", "Close", "High", "Low", "Open", "Volume"], ["AAPL"] * 6],
+            names=["Price", "Ticker"],
+        ),
+        # several tickers
+        pd.MultiIndex.from_product(
+            [["Close", "Open", "High", "Low"], ["AAPL", "MSFT"]],
+            names=["Type", "Ticker"],
+        ),
+    ],
+)
+def test_validate_data_multiindex_valid(columns):
     """Test _validate_data_multiindex with valid MultiIndex."""
-    # Define input: Valid MultiIndex DataFrame with fixed, smaller values
-    arrays = [["Close", "Open", "High", "Low"], ["AAPL", "AAPL", "AAPL", "AAPL"]]
-    index = pd.MultiIndex.from_arrays(arrays, names=["Type", "Ticker"])
-
-    # Smaller fixed dataset
-    data = [[100, 99, 101, 98], [101, 100, 102, 99], [102, 101, 103, 100]]
-
-    df = pd.DataFrame(data, columns=index)
-
-    # Perform test
-    _validate_data_multiindex(df.columns)
+    _validate_data_multiindex(columns)
 
 
 # Test for _validate_data_numeric
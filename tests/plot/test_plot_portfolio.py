@@ -1,3 +1,5 @@
+import time
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -9,89 +11,129 @@ from backtest_bay.plot.plot_portfolio import (
     _calculate_portfolio_return,
     _calculate_trades,
     _calculate_years,
+    plot_portfolio,
 )
 
+# Daily indices for the volatility tests, keyed by their length.
+DAILY_INDEX = {n: pd.date_range(start="2022-01-01", periods=n) for n in (1, 5)}
+
+
+# Tests for plot_portfolio
+def test_plot_portfolio_zero_first_close():
+    """Test if plot_portfolio shows NaN buy and hold metrics for a first price of 0."""
+    portfolio = pd.DataFrame(
+        {
+            "Close": [0.0, 10.0, 12.0],
+            "shares": [0.0, 0.0, 0.0],
+            "cash": [100.0, 100.0, 100.0],
+            "assets": [100.0, 100.0, 100.0],
+        },
+        index=pd.date_range(start="2022-01-01", periods=3),
+    )
+    fig = plot_portfolio(portfolio, title="Test", tac=0.01, cash=100.0)
+    metrics = dict(zip(*fig.data[-1].cells.values, strict=True))
+    assert metrics["Annualized Buy and Hold Return"] == "nan%"
+    assert metrics["Annualized Buy and Hold Volatility"] == "nan%"
+    assert metrics["Total Strategy Return"] == "0.00%"
+
 
 # Tests for _calculate_portfolio_return
 @pytest.mark.parametrize(
-    ("stock", "expected_return"),
+    ("values", "expected_return"),
     [
-        (pd.Series([100]), 0.0),
-        (pd.Series([100, 150]), 50.0),
-        (pd.Series([200, 100]), -50.0),
-        (pd.Series([100, 100]), 0.0),
-        (pd.Series([50, 75, 100]), 100.0),
+        ([100], 0.0),
+        ([100, 150], 50.0),
+        ([200, 100], -50.0),
+        ([100, 100], 0.0),
+        ([50, 75, 100], 100.0),
     ],
 )
-def test_calculate_portfolio_return_valid_calculation(stock, expected_return):
+def test_calculate_portfolio_return_valid_calculation(values, expected_return):
     """Test if _calculate_portfolio_return returns the correct return value."""
-    result = _calculate_portfolio_return(stock)
+    result = _calculate_portfolio_return(np.array(values, dtype=np.float64))
     assert result == expected_return
 
 
+@pytest.mark.parametrize("values", [[0], [0, 100]])
+def test_calculate_portfolio_return_zero_initial_value(values):
+    """Test if _calculate_portfolio_return returns NaN for an initial value of 0,
+    also for a single value."""
+    result = _calculate_portfolio_return(np.array(values, dtype=np.float64))
+    assert np.isnan(result)
+
+
 # Tests for _calculate_years
 @pytest.mark.parametrize(
-    ("index", "expected"),
+    ("dates", "unit", "expected"),
     [
-        (pd.to_datetime(["2020-01-01", "2020-12-31"]), 1),
-        (pd.to_datetime(["2020-01-01", "2020-07-01"]), 0.5),
-        (pd.to_datetime(["2010-01-01", "2020-01-01"]), 10),
-        (pd.to_datetime(["2020-01-01", "2020-01-01"]), 0),
-        (pd.to_datetime(["2020-01-01  00:00:00", "2020-01-01  12:00:00"]), 0.5 / 365),
+        (["2020-01-01", "2020-12-31"], "ns", 1),
+        (["2020-01-01", "2020-07-01"], "ns", 0.5),
+        (["2010-01-01", "2020-01-01"], "ns", 10),
+        (["2010-01-01", "2020-01-01"], "us", 10),
+        (["2020-01-01", "2020-01-01"], "ns", 0),
+        (["2020-01-01T00:00:00", "2020-01-01T12:00:00"], "ns", 0.5 / 365),
     ],
 )
-def test_calculate_years(index, expected):
+def test_calculate_years(dates, unit, expected):
     """Test if _calculate_years correctly computes the number of years."""
+    index = pd.DatetimeIndex(np.array(dates, dtype=f"datetime64[{unit}]"))
     result = _calculate_years(index)
     assert np.isclose(result, expected, atol=1e-2)
 
 
 # Tests for _calculate_annualized_return
 @pytest.mark.parametrize(
-    ("stock", "expected"),
+    ("values", "dates", "expected"),
     [
+        ([100, 100, 100], ["2020-01-01", "2020-07-01", "2021-01-01"], 0),
+        ([100, 110], ["2020-01-01", "2021-01-01"], 10.00),
+        ([200, 100], ["2020-01-01", "2021-01-01"], -50.00),
         (
-            pd.Series(
-                [100, 100, 100],
-                index=pd.to_datetime(["2020-01-01", "2020-07-01", "2021-01-01"]),
-            ),
-            0,
-        ),
-        (
-            pd.Series([100, 110], index=pd.to_datetime(["2020-01-01", "2021-01-01"])),
-            10.00,
-        ),
-        (
-            pd.Series([200, 100], index=pd.to_datetime(["2020-01-01", "2021-01-01"])),
-            -50.00,
-        ),
-        (
-            pd.Series([100, 200], index=pd.to_datetime(["2018-01-01", "2021-01-01"])),
+            [100, 200],
+            ["2018-01-01", "2021-01-01"],
             round(((200 / 100) ** (1 / 3) - 1) * 100, 2),
         ),
     ],
 )
-def test_calculate_annualized_return(stock, expected):
+def test_calculate_annualized_return(values, dates, expected):
     """Test if _calculate_annualized_return correctly calculates annualized returns."""
-    result = _calculate_annualized_return(stock)
+    portfolio_return = _calculate_portfolio_return(np.array(values, dtype=np.float64))
+    years = _calculate_years(pd.DatetimeIndex(np.array(dates, dtype="datetime64[ns]")))
+    result = _calculate_annualized_return(portfolio_return, years)
     assert np.isclose(result, expected, atol=1e-1)
 
 
+def test_calculate_annualized_return_keeps_small_returns_precise():
+    """Test if _calculate_annualized_return keeps the digits of tiny returns."""
+    result = _calculate_annualized_return(1e-10, 1.0)
+    assert result == pytest.approx(1e-10, rel=1e-12, abs=0)
+
+
 # Tests for _calculate_trades
 @pytest.mark.parametrize(
     ("shares", "expected"),
     [
-        (pd.Series([10, 10, 10, 10]), 0),
-        (pd.Series([0, 10, 0, 10, 0]), 4),
-        (pd.Series([0, -10, 0, 0, 0]), 2),
+        ([10, 10, 10, 10], 0),
+        ([0, 10, 0, 10, 0], 4),
+        ([0, -10, 0, 0, 0], 2),
     ],
 )
 def test_calculate_trades(shares, expected):
     """Test if _calculate_trades correctly counts the number of trades."""
-    result = _calculate_trades(shares)
+    result = _calculate_trades(pd.Series(shares))
     assert result == expected
 
 
+def test_calculate_trades_scales_linearly():
+    """Test if _calculate_trades stays fast on a million shares, which a quadratic
+    scan would not."""
+    shares = pd.Series(np.random.default_rng(0).choice([-1, 0, 1], size=10**6))
+    time_budget = 2.0
+    start = time.perf_counter()
+    _calculate_trades(shares)
+    assert time.perf_counter() - start < time_budget
+
+
 # Tests for _calculate_annualized_volatility
 @pytest.mark.parametrize(
     ("stock_prices", "expected_volatility"),
@@ -104,11 +146,33 @@ def test_calculate_trades(shares, expected):
 def test_calculate_annualized_volatility(stock_prices, expected_volatility):
     """Test if _calculate_annualized_volatility correctly calculates annualized
     volatility."""
+    years = _calculate_years(DAILY_INDEX[len(stock_prices)])
+    values = np.array(stock_prices, dtype=np.float64)
+    result = _calculate_annualized_volatility(values, years)
+    assert result == expected_volatility
+
+
+def test_calculate_annualized_volatility_zero_years():
+    """Test if _calculate_annualized_volatility returns 0 without dividing by zero
+    years."""
+    with np.errstate(divide="raise"):
+        result = _calculate_annualized_volatility(np.array([100.0, 110.0]), 0.0)
+    assert result == 0
+
+
+def test_calculate_annualized_volatility_matches_pandas_log_returns():
+    """Test if _calculate_annualized_volatility matches the volatility of pandas log
+    returns."""
+    rng = np.random.default_rng(0)
     stock = pd.Series(
-        stock_prices, index=pd.date_range(start="2022-01-01", periods=len(stock_prices))
+        100 * np.exp(np.cumsum(rng.normal(0, 0.01, 250))),
+        index=pd.date_range(start="2022-01-01", periods=250),
     )
-    result = _calculate_annualized_volatility(stock)
-    assert result == expected_volatility
+    years = _calculate_years(stock.index)
+    daily_volatility = np.log(stock / stock.shift(1)).dropna().std()
+    expected = daily_volatility * np.sqrt(365 / years) * 100
+    result = _calculate_annualized_volatility(stock.to_numpy(), years)
+    assert result == pytest.approx(expected)
 
 
 # Tests for _buy_and_hold_strategy
@@ -116,14 +180,16 @@ def test_calculate_annualized_volatility(stock_prices, expected_volatility):
     ("initial_cash", "prices", "expected"),
     [
         # Enough cash
-        (105, pd.Series([10, 12, 15, 18]), pd.Series([105.0, 125.0, 155.0, 185.0])),
+        (105, np.array([10, 12, 15, 18]), np.array([105.0, 125.0, 155.0, 185.0])),
         #  Not enough cash to buy even one share
-        (5, pd.Series([10, 12, 15, 18]), pd.Series([5.0, 5.0, 5.0, 5.0])),
+        (5, np.array([10, 12, 15, 18]), np.array([5.0, 5.0, 5.0, 5.0])),
         # Cash exactly enough to buy one share
-        (10, pd.Series([10, 12, 15, 18]), pd.Series([10.0, 12.0, 15.0, 18.0])),
+        (10, np.array([10, 12, 15, 18]), np.array([10.0, 12.0, 15.0, 18.0])),
+        # First price of zero
+        (10, np.array([0, 12, 15, 18]), np.full(4, np.nan)),
     ],
 )
 def test_buy_and_hold_strategy_correct_calculation(initial_cash, prices, expected):
     """Test if _buy_and_hold_strategy correctly calculates buy and hold strategy."""
     result = _buy_and_hold_strategy(initial_cash, prices)
-    pd.testing.assert_series_equal(result, expected)
+    np.testing.assert_array_equal(result, expected)
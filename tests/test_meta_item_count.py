@@ -0,0 +1,27 @@
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+TESTS = Path(__file__).parent
+
+# About 10% above the current number of test items.
+ITEM_BUDGET = 180
+
+
+def test_collected_item_count_stays_within_budget():
+    """Guard against parametrize explosions that slow down pytest's collection.
+
+    Raise the budget deliberately when new tests are added, instead of adding rows
+    that test the same code path.
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", "-q", str(TESTS)],
+        capture_output=True,
+        check=False,
+        cwd=TESTS.parent,
+        text=True,
+    )
+    collected = re.search(r"(\d+) tests? collected", result.stdout)
+    assert collected is not None, result.stdout
+    assert int(collected.group(1)) <= ITEM_BUDGET